@@ -3,10 +3,24 @@ import os
 import time
 import json
 import shutil
+import copy
 import math
 import uuid
+import hashlib
+import sqlite3
+import struct
 import queue
 import ctypes
+import threading
+import bisect
+import platform
+import tempfile
+import weakref
+import atexit
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from collections import deque, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 def resource_path(relative_path):
@@ -26,12 +40,11 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                              QSpinBox, QColorDialog, QFontComboBox, QComboBox, QDialog, QLineEdit, 
                              QDialogButtonBox, QAbstractItemView, QCheckBox, QTextEdit, QFrame,
                              QFormLayout, QGroupBox, QRadioButton, QButtonGroup, QProgressBar)
-from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, QRect, QSize, pyqtSignal, QObject, QLineF, QThread
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF, QRect, QSize, pyqtSignal, QObject, QLineF, QThread, QFileSystemWatcher, QEvent
 from PyQt6.QtGui import (QPixmap, QPainter, QPen, QColor, QFont, QAction, QIcon, 
                          QBrush, QImage, QPainterPath)
 
-from pynput import mouse, keyboard
-from PIL import ImageGrab
+from PIL import Image, ImageGrab
 import cv2
 import numpy as np
 from docx import Document
@@ -173,10 +186,21 @@ class RecordingOverlay(QWidget):
         self.step_lbl = QLabel("Steps: 0")
         self.step_lbl.setStyleSheet("color: #dddddd; font-family: 'Segoe UI'; font-size: 13px; font-weight: 500;")
         
+        sep2 = QFrame()
+        sep2.setFixedWidth(1)
+        sep2.setFixedHeight(14)
+        sep2.setStyleSheet("background-color: #555;")
+        
+        # Click-to-capture latency
+        self.latency_lbl = QLabel("p50 – / p95 – ms")
+        self.latency_lbl.setStyleSheet("color: #999999; font-family: 'Segoe UI'; font-size: 12px;")
+        
         inner_layout.addWidget(self.dot_lbl)
         inner_layout.addWidget(self.rec_lbl)
         inner_layout.addWidget(sep)
         inner_layout.addWidget(self.step_lbl)
+        inner_layout.addWidget(sep2)
+        inner_layout.addWidget(self.latency_lbl)
         
         layout.addWidget(self.container)
         
@@ -199,6 +223,15 @@ class RecordingOverlay(QWidget):
     def update_steps(self, count):
         self.step_lbl.setText(f"Steps: {count}")
 
+    def update_latency(self, rolling, queue_depth=0):
+        if rolling is None:
+            self.latency_lbl.setText("p50 – / p95 – ms")
+            return
+        p50, p95 = rolling
+        self.latency_lbl.setText(f"p50 {p50:.0f} / p95 {p95:.0f} ms · Q {queue_depth}")
+        # Red when screenshots lag noticeably behind the click
+        self.latency_lbl.setStyleSheet(f"color: {'#ff6666' if p95 > 500 else '#999999'}; font-family: 'Segoe UI'; font-size: 12px;")
+
 class Layer:
     def __init__(self, ltype, data, label, is_global=False, uid=None):
         self.type = ltype
@@ -284,11 +317,51 @@ class ClickMarkerSettings:
 
 class AppSettings:
     """Handles global application settings like shortcuts and theme"""
+    # Recorder tuning, stored flat in app_settings.json next to the UI settings
+    CAPTURE_DEFAULTS = {
+        "capture_mode": "click",       # "click" = grab after each click, "ring" = continuous frame buffer, "video" = video timeline
+        "capture_video_fps": 5,        # Frame rate of the video timeline
+        "capture_fps": 10,             # Grab rate of the ring buffer
+        "capture_ring_size": 10,       # Max frames kept in the ring buffer
+        "capture_hover_frame": False,  # Also keep the frame just before the click
+        "capture_settle_max_ms": 600,  # Longest wait for the screen to stop changing after a click
+        "capture_settle_min_ms": 40,   # Give the clicked app a moment to react before comparing
+        "capture_settle_threshold": 1.0, # Mean abs. pixel difference of any screen tile still counted as "settled"
+        "capture_scope": "desktop",    # "desktop", "monitor" (monitor under the click) or "region"
+        "capture_backend": "auto",     # "auto", "imagegrab", "x11shm" or "synthetic"
+        "capture_resolution": "native", # "native", "1x" (undo display scaling) or "max_edge"
+        "capture_max_edge": 1920,      # Longest edge of a capture with the "max_edge" policy
+        "capture_dedup": "share",      # Unchanged screen: "keep" new image, "share" previous buffer, "merge" into previous step
+        "capture_dedup_distance": 2,   # Max. perceptual hash bit difference before frames are compared pixel by pixel
+        "capture_coalesce_ms": 350,    # Clicks on the same spot within this time become one step (0 = off)
+        "capture_coalesce_px": 6,      # Max. distance between coalesced clicks
+        "capture_drag_px": 12,         # Press/release further apart than this is recorded as a drag
+        "capture_keyboard": False,     # Aggregate typed text into the step description
+        "capture_typing_pause_ms": 1200, # Typing pause that ends an input (Enter/Tab end it immediately)
+        "capture_mask_passwords": True, # Replace text typed into password fields with dots (all text where fields can't be inspected)
+        "capture_scroll": False,       # Stitch frames taken while scrolling into one tall step
+        "capture_scroll_pause_ms": 150, # Scroll pause after which the next frame is taken
+        "capture_scroll_end_ms": 1500, # Scroll pause that ends the long screenshot
+        "capture_process": False,      # Capture in a worker process, frames passed via shared memory
+        "capture_shm_slots": 4,        # Frames in flight between worker and UI (backpressure limit)
+        "capture_queue_wait_ms": 1500, # Longer without a free slot: the click is merged into the previous step
+        "image_memory_mb": 1024,       # Decoded step images kept in RAM, older ones are compressed
+        "image_compressed_mb": 512,    # Compressed step images kept in RAM, older ones spill to a temp dir
+        "project_format": "folder",    # New projects: "folder" (project.json + images/) or "container" (.csgproj)
+        "image_codec": "png",          # Codec for newly saved step images, see IMAGE_CODECS
+        "capture_rules": [             # CaptureFilter rules, checked in the input hook before any grab
+            {"name": "Taskleiste", "region": "taskbar"},
+            {"name": "ClickStep", "region": "app"},
+        ],
+    }
+
     def __init__(self):
         self.path = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "app_settings.json")
         self.theme = "dark" # "dark" or "light"
         self.shortcut_record = "<ctrl>+<alt>+s"
         self.shortcut_editor = "<ctrl>+<alt>+e"
+        for key, default in self.CAPTURE_DEFAULTS.items():
+            setattr(self, key, copy.deepcopy(default)) # Own copy, editing the rules must not change the defaults
         self.load()
 
     def load(self):
@@ -299,17 +372,22 @@ class AppSettings:
                     self.theme = data.get("theme", "dark")
                     self.shortcut_record = data.get("shortcut_record", "<ctrl>+<alt>+s")
                     self.shortcut_editor = data.get("shortcut_editor", "<ctrl>+<alt>+e")
+                    for key, default in self.CAPTURE_DEFAULTS.items():
+                        setattr(self, key, data[key] if key in data else copy.deepcopy(default))
             except: pass
 
     def save(self):
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            "theme": self.theme, 
+            "shortcut_record": self.shortcut_record,
+            "shortcut_editor": self.shortcut_editor
+        }
+        for key in self.CAPTURE_DEFAULTS:
+            data[key] = getattr(self, key)
         try:
             with open(self.path, 'w') as f:
-                json.dump({
-                    "theme": self.theme, 
-                    "shortcut_record": self.shortcut_record,
-                    "shortcut_editor": self.shortcut_editor
-                }, f)
+                json.dump(data, f)
         except: pass
 
 class SettingsDialog(QDialog):
@@ -348,6 +426,112 @@ class SettingsDialog(QDialog):
         
         layout.addWidget(shortcut_group)
         
+        # --- CAPTURE GROUP ---
+        capture_group = QGroupBox("Aufnahme")
+        capture_layout = QFormLayout(capture_group)
+        capture_layout.setContentsMargins(15, 20, 15, 15)
+        capture_layout.setSpacing(15)
+        
+        self.combo_capture_mode = QComboBox()
+        self.combo_capture_mode.addItem("Nach jedem Klick", "click")
+        self.combo_capture_mode.addItem("Ringpuffer (schnelle Klickfolgen)", "ring")
+        self.combo_capture_mode.addItem("Video-Zeitleiste (Frame später wählbar)", "video")
+        self.combo_capture_mode.setCurrentIndex(max(0, self.combo_capture_mode.findData(self.settings.capture_mode)))
+        
+        self.spin_capture_fps = QSpinBox()
+        self.spin_capture_fps.setRange(1, 60)
+        self.spin_capture_fps.setSuffix(" fps")
+        self.spin_capture_fps.setValue(self.settings.capture_fps)
+        
+        self.spin_settle_max = QSpinBox()
+        self.spin_settle_max.setRange(50, 5000)
+        self.spin_settle_max.setSingleStep(50)
+        self.spin_settle_max.setSuffix(" ms")
+        self.spin_settle_max.setValue(self.settings.capture_settle_max_ms)
+        
+        self.combo_capture_scope = QComboBox()
+        self.combo_capture_scope.addItem("Gesamter Desktop", "desktop")
+        self.combo_capture_scope.addItem("Monitor unter dem Klick", "monitor")
+        self.combo_capture_scope.addItem("Bereich (bei Aufnahmestart wählen)", "region")
+        self.combo_capture_scope.setCurrentIndex(max(0, self.combo_capture_scope.findData(self.settings.capture_scope)))
+        
+        self.combo_capture_backend = QComboBox()
+        self.combo_capture_backend.addItem("Automatisch", "auto")
+        self.combo_capture_backend.addItem("PIL ImageGrab", "imagegrab")
+        self.combo_capture_backend.addItem("X11 Shared Memory (Linux)", "x11shm")
+        self.combo_capture_backend.setCurrentIndex(max(0, self.combo_capture_backend.findData(self.settings.capture_backend)))
+        
+        self.combo_capture_resolution = QComboBox()
+        self.combo_capture_resolution.addItem("Nativ (volle Auflösung)", "native")
+        self.combo_capture_resolution.addItem("1x (Anzeigeskalierung herausrechnen)", "1x")
+        self.combo_capture_resolution.addItem("Max. Kantenlänge", "max_edge")
+        self.combo_capture_resolution.setCurrentIndex(max(0, self.combo_capture_resolution.findData(self.settings.capture_resolution)))
+        
+        self.spin_max_edge = QSpinBox()
+        self.spin_max_edge.setRange(640, 7680)
+        self.spin_max_edge.setSingleStep(160)
+        self.spin_max_edge.setSuffix(" px")
+        self.spin_max_edge.setValue(self.settings.capture_max_edge)
+        
+        self.combo_capture_dedup = QComboBox()
+        self.combo_capture_dedup.addItem("Behalten (eigenes Bild)", "keep")
+        self.combo_capture_dedup.addItem("Bild teilen (spart Speicher)", "share")
+        self.combo_capture_dedup.addItem("Mit vorherigem Schritt zusammenführen", "merge")
+        self.combo_capture_dedup.setCurrentIndex(max(0, self.combo_capture_dedup.findData(self.settings.capture_dedup)))
+        
+        self.spin_image_memory = QSpinBox()
+        self.spin_image_memory.setRange(128, 65536)
+        self.spin_image_memory.setSingleStep(128)
+        self.spin_image_memory.setSuffix(" MB")
+        self.spin_image_memory.setValue(self.settings.image_memory_mb)
+        
+        self.combo_project_format = QComboBox()
+        self.combo_project_format.addItem("Ordner (project.json + Bilder)", "folder")
+        self.combo_project_format.addItem("Einzeldatei (.csgproj)", "container")
+        self.combo_project_format.setCurrentIndex(max(0, self.combo_project_format.findData(self.settings.project_format)))
+        
+        self.combo_image_codec = QComboBox()
+        self.combo_image_codec.addItem("PNG Standard", "png")
+        self.combo_image_codec.addItem("PNG schnell (Stufe 1)", "png-fast")
+        self.combo_image_codec.addItem("PNG maximal (Stufe 9)", "png-max")
+        self.combo_image_codec.addItem("PNG für flache UI (RLE, sehr schnell)", "png-flat")
+        self.combo_image_codec.addItem("WebP verlustfrei (klein)", "webp")
+        self.combo_image_codec.addItem("Kacheln (projektübergreifend dedupliziert)", "tiles")
+        self.combo_image_codec.setCurrentIndex(max(0, self.combo_image_codec.findData(self.settings.image_codec)))
+        
+        self.chk_hover_frame = QCheckBox("Bild vor dem Klick behalten (Hover)")
+        self.chk_hover_frame.setChecked(self.settings.capture_hover_frame)
+        
+        capture_layout.addRow("Modus:", self.combo_capture_mode)
+        capture_layout.addRow("Bereich:", self.combo_capture_scope)
+        capture_layout.addRow("Backend:", self.combo_capture_backend)
+        capture_layout.addRow("Auflösung:", self.combo_capture_resolution)
+        capture_layout.addRow("Max. Kantenlänge:", self.spin_max_edge)
+        capture_layout.addRow("Unveränderter Bildschirm:", self.combo_capture_dedup)
+        capture_layout.addRow("Ringpuffer-Rate:", self.spin_capture_fps)
+        capture_layout.addRow("Max. Wartezeit (Bildruhe):", self.spin_settle_max)
+        capture_layout.addRow("Bildspeicher (RAM):", self.spin_image_memory)
+        capture_layout.addRow("Neue Projekte als:", self.combo_project_format)
+        capture_layout.addRow("Bildformat:", self.combo_image_codec)
+        capture_layout.addRow("", self.chk_hover_frame)
+        
+        self.chk_keyboard = QCheckBox("Tastatureingaben in Beschreibung übernehmen")
+        self.chk_keyboard.setChecked(self.settings.capture_keyboard)
+        self.chk_mask_passwords = QCheckBox("Passwortfelder maskieren")
+        self.chk_mask_passwords.setChecked(self.settings.capture_mask_passwords)
+        self.chk_mask_passwords.setToolTip("Wo der Feldtyp nicht erkannt werden kann (z.B. außerhalb von Windows), wird jede Eingabe maskiert")
+        self.chk_scroll = QCheckBox("Beim Scrollen lange Screenshots erstellen")
+        self.chk_scroll.setChecked(self.settings.capture_scroll)
+        capture_layout.addRow("", self.chk_keyboard)
+        capture_layout.addRow("", self.chk_mask_passwords)
+        capture_layout.addRow("", self.chk_scroll)
+        
+        self.chk_capture_process = QCheckBox("Aufnahme in eigenem Prozess (entlastet die Oberfläche)")
+        self.chk_capture_process.setChecked(self.settings.capture_process)
+        capture_layout.addRow("", self.chk_capture_process)
+        
+        layout.addWidget(capture_group)
+        
         # --- THEME GROUP ---
         theme_group = QGroupBox("Erscheinungsbild")
         theme_layout = QVBoxLayout(theme_group)
@@ -395,7 +579,23 @@ class SettingsDialog(QDialog):
         return {
             "theme": "dark" if self.radio_dark.isChecked() else "light",
             "shortcut_record": self.edit_record.text().lower(),
-            "shortcut_editor": self.edit_editor.text().lower()
+            "shortcut_editor": self.edit_editor.text().lower(),
+            "capture_mode": self.combo_capture_mode.currentData(),
+            "capture_scope": self.combo_capture_scope.currentData(),
+            "capture_backend": self.combo_capture_backend.currentData(),
+            "capture_dedup": self.combo_capture_dedup.currentData(),
+            "capture_fps": self.spin_capture_fps.value(),
+            "capture_settle_max_ms": self.spin_settle_max.value(),
+            "capture_resolution": self.combo_capture_resolution.currentData(),
+            "capture_max_edge": self.spin_max_edge.value(),
+            "image_memory_mb": self.spin_image_memory.value(),
+            "project_format": self.combo_project_format.currentData(),
+            "image_codec": self.combo_image_codec.currentData(),
+            "capture_hover_frame": self.chk_hover_frame.isChecked(),
+            "capture_keyboard": self.chk_keyboard.isChecked(),
+            "capture_mask_passwords": self.chk_mask_passwords.isChecked(),
+            "capture_scroll": self.chk_scroll.isChecked(),
+            "capture_process": self.chk_capture_process.isChecked()
         }
 
 class LayerListWidget(QListWidget):
@@ -1582,6 +1782,74 @@ class ZoomableGraphicsView(QGraphicsView):
         else:
             super().mouseReleaseEvent(event)
 
+class TimelineFrameDialog(QDialog):
+    """Pick another frame for a step from the recorded video timeline"""
+    def __init__(self, timeline, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Frame wählen")
+        self.resize(900, 620)
+        if parent:
+            self.setStyleSheet(parent.styleSheet())
+        
+        self.video = timeline['video']
+        self.crop = timeline.get('crop')
+        self.picked = timeline['frame']
+        self.times = VideoTimeline.load_times(self.video)
+        self.cap = cv2.VideoCapture(self.video)
+        count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) or len(self.times)
+        
+        layout = QVBoxLayout(self)
+        self.preview = QLabel()
+        self.preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview.setMinimumHeight(480)
+        self.lbl_time = QLabel()
+        
+        # A few seconds around the original frame are enough to find the right moment
+        span = int(timeline.get('fps', 5) * 5)
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(max(0, self.picked - span), max(0, min(count - 1, self.picked + span)))
+        self.slider.setValue(self.picked)
+        self.slider.valueChanged.connect(self.show_frame)
+        
+        btn_layout = QHBoxLayout()
+        btn_ok = QPushButton("Übernehmen")
+        btn_ok.clicked.connect(self.accept)
+        btn_cancel = QPushButton("Abbrechen")
+        btn_cancel.clicked.connect(self.reject)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_cancel)
+        btn_layout.addWidget(btn_ok)
+        
+        layout.addWidget(self.preview)
+        layout.addWidget(self.slider)
+        layout.addWidget(self.lbl_time)
+        layout.addLayout(btn_layout)
+        
+        self.frame = None
+        self.show_frame(self.picked)
+
+    def show_frame(self, idx):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ok, frame = self.cap.read()
+        if not ok: return
+        if self.crop:
+            l, t, r, b = self.crop
+            frame = frame[t:b, l:r]
+        self.frame = np.ascontiguousarray(frame)
+        self.picked = idx
+        
+        h, w = self.frame.shape[:2]
+        rgb = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+        qimg = QImage(rgb.data, w, h, w * 3, QImage.Format.Format_RGB888)
+        self.preview.setPixmap(QPixmap.fromImage(qimg).scaled(self.preview.size(), Qt.AspectRatioMode.KeepAspectRatio,
+                                                              Qt.TransformationMode.SmoothTransformation))
+        offset = f" ({self.times[idx]:.2f} s)" if idx < len(self.times) else ""
+        self.lbl_time.setText(f"Frame {idx}{offset}")
+
+    def done(self, result):
+        self.cap.release()
+        super().done(result)
+
 class ProEditor(QMainWindow):
     def __init__(self, steps, globals, crop, save_cb, project_name=None, parent_window=None, settings=None):
         super().__init__()
@@ -1603,6 +1871,9 @@ class ProEditor(QMainWindow):
             self.setWindowTitle(f"ClickStep Guide Editor - {project_name}")
         
         self.undo_stack = [] # List of snapshots
+        self.saver = BackgroundSaver()
+        self.saver.progress.connect(self.on_save_progress)
+        self.saver.finished.connect(self.on_save_finished)
         
         self.scene = EditorScene(self)
         self.view = ZoomableGraphicsView(self.scene)
@@ -1614,6 +1885,13 @@ class ProEditor(QMainWindow):
         self.view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
         
         self.setCentralWidget(self.view)
+        
+        # Thumbnails of images that are not decoded yet are filled in as the prefetch makes them
+        self.thumb_pending = []
+        self.thumb_timer = QTimer(self)
+        self.thumb_timer.setInterval(150)
+        self.thumb_timer.timeout.connect(self.fill_thumbnails)
+        
         self.setup_ui()
         
         # Initialize project directory
@@ -1637,6 +1915,11 @@ class ProEditor(QMainWindow):
         
     def closeEvent(self, event):
         """Show recorder window when editor is closed"""
+        if self.saver.is_busy(): # Let a running save finish
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            self.saver.wait()
+            QApplication.restoreOverrideCursor()
+            QApplication.processEvents() # Deliver the finished signal
         if self.recorder_window:
             self.recorder_window.show()
         super().closeEvent(event)
@@ -1821,6 +2104,14 @@ class ProEditor(QMainWindow):
         self.btn_crop.setCheckable(True)
         self.btn_crop.clicked.connect(lambda: self.set_tool('crop'))
         
+        btn_highlight_change = QPushButton("🎯 Änderung")
+        btn_highlight_change.setToolTip("Geänderten Bereich zum vorherigen Schritt hervorheben")
+        btn_highlight_change.clicked.connect(self.highlight_change)
+        
+        btn_suggest_crop = QPushButton("✂️ Vorschlag")
+        btn_suggest_crop.setToolTip("Ausschnitt aus den Änderungen aller Schritte vorschlagen")
+        btn_suggest_crop.clicked.connect(self.suggest_crop)
+        
         btn_delete = QPushButton("🗑️ Delete")
         btn_delete.setObjectName("DestructiveButton")
         btn_delete.clicked.connect(self.delete_selected)
@@ -1843,6 +2134,14 @@ class ProEditor(QMainWindow):
         btn_undo.setShortcut("Ctrl+Z")
         btn_undo.clicked.connect(self.undo)
         
+        self.btn_hover = QPushButton("🖱️ Hover")
+        self.btn_hover.setToolTip("Zwischen Klick-Bild und Bild vor dem Klick wechseln")
+        self.btn_hover.clicked.connect(self.swap_hover_frame)
+        
+        self.btn_timeline = QPushButton("🎞️ Frame")
+        self.btn_timeline.setToolTip("Anderen Frame aus der Video-Zeitleiste wählen")
+        self.btn_timeline.clicked.connect(self.repick_timeline_frame)
+        
         btn_export = QPushButton("💾 EXPORT")
         btn_export.setObjectName("AccentButton")
         btn_export.clicked.connect(self.on_export_clicked)
@@ -1854,10 +2153,11 @@ class ProEditor(QMainWindow):
         toolbar.addWidget(create_group("Anmerkungen", [self.btn_infobox, self.btn_icon, self.btn_zoom]))
         toolbar.addSeparator()
         
-        toolbar.addWidget(create_group("Effekte", [self.btn_blur, self.btn_spotlight, self.btn_global_blur, self.btn_crop]))
+        toolbar.addWidget(create_group("Effekte", [self.btn_blur, self.btn_spotlight, self.btn_global_blur, self.btn_crop,
+                                                 btn_highlight_change, btn_suggest_crop]))
         toolbar.addSeparator()
         
-        toolbar.addWidget(create_group("Bearbeiten", [btn_delete, btn_delete_step, btn_undo]))
+        toolbar.addWidget(create_group("Bearbeiten", [btn_delete, btn_delete_step, btn_undo, self.btn_hover, self.btn_timeline]))
         toolbar.addSeparator()
         
         toolbar.addWidget(create_group("Datei", [btn_save, btn_save_as]))
@@ -2126,6 +2426,95 @@ class ProEditor(QMainWindow):
             self.update_thumbnails()
             self.load_step(self.current_idx)
 
+    def swap_hover_frame(self):
+        """Swap the step image with the frame captured just before the click"""
+        if not self.steps: return
+        step = self.steps[self.current_idx]
+        if step.hover_ref is None:
+            self.statusBar().showMessage("Für diesen Schritt gibt es kein Hover-Bild.", 3000)
+            return
+        self.push_undo()
+        step.image_ref, step.hover_ref = step.hover_ref, step.image_ref
+        step.meta.pop('changes', None) # Recomputed for the other image when needed
+        self.update_thumbnails()
+        self.load_step(self.current_idx)
+
+    def step_changes(self, idx):
+        """Changed regions of a step against its predecessor (computed now if not recorded)"""
+        step = self.steps[idx]
+        if 'changes' not in step.meta:
+            prev = self.steps[idx - 1].raw_img if idx > 0 else None
+            step.meta['changes'] = find_changed_regions(prev, step.raw_img) if prev is not None else []
+        return step.meta['changes']
+
+    def highlight_change(self):
+        """Spotlight (or zoom, for small changes) on the main change of this step"""
+        if not self.steps: return
+        regions = self.step_changes(self.current_idx)
+        step = self.steps[self.current_idx]
+        h, w = step.image_ref.shape[:2]
+        if not regions or regions[0] == [0, 0, w, h]:
+            self.statusBar().showMessage("Keine eingrenzbare Änderung zum vorherigen Schritt.", 3000)
+            return
+        
+        self.push_undo()
+        l, t, r, b = regions[0]
+        pad = 12
+        if max(r - l, b - t) < 120:
+            # Too small to see in the document: magnify it next to the change
+            size = 200
+            x = l + (r - l) // 2 + 40 if l + size + 80 < w else max(0, l - size - 40)
+            y = min(max(0, t - size // 2), max(0, h - size))
+            step.layers.append(Layer('zoom', {'x': x, 'y': y, 'size': size,
+                                              'target_x': (l + r) // 2, 'target_y': (t + b) // 2,
+                                              'color': (0, 175, 255)}, "Zoom"))
+        else:
+            l, t, r, b = max(0, l - pad), max(0, t - pad), min(w, r + pad), min(h, b + pad)
+            step.layers.append(Layer('spotlight', {'x': l, 'y': t, 'w': r - l, 'h': b - t, 'opacity': 0.6,
+                                                   'shape': 'rect', 'color': (0, 0, 0)}, "Spotlight"))
+        self.load_step(self.current_idx)
+
+    def suggest_crop(self):
+        """Global crop around everything that changes during the recording"""
+        if len(self.steps) < 2: return
+        self.save_current_state()
+        boxes = []
+        for i in range(1, len(self.steps)):
+            h, w = self.steps[i].image_ref.shape[:2]
+            boxes += [r for r in self.step_changes(i) if r != [0, 0, w, h]]
+        if not boxes:
+            self.statusBar().showMessage("Keine Änderungen gefunden, kein Vorschlag möglich.", 3000)
+            return
+        
+        h, w = self.steps[0].image_ref.shape[:2]
+        pad = 40
+        crop = (max(0, min(b[0] for b in boxes) - pad), max(0, min(b[1] for b in boxes) - pad),
+                min(w, max(b[2] for b in boxes) + pad), min(h, max(b[3] for b in boxes) + pad))
+        self.push_undo()
+        self.global_crop = crop
+        self.load_step(self.current_idx)
+        self.update_thumbnails()
+        self.statusBar().showMessage(f"Ausschnitt vorgeschlagen: {crop[2] - crop[0]}x{crop[3] - crop[1]}px (Undo zum Verwerfen)", 5000)
+
+    def repick_timeline_frame(self):
+        """Replace the step image with another frame of the session's video timeline"""
+        if not self.steps: return
+        step = self.steps[self.current_idx]
+        timeline = step.meta.get('timeline')
+        if not timeline or not os.path.exists(timeline['video']):
+            self.statusBar().showMessage("Für diesen Schritt gibt es keine Video-Zeitleiste.", 3000)
+            return
+        dlg = TimelineFrameDialog(timeline, self)
+        if not dlg.exec() or dlg.frame is None or dlg.picked == timeline['frame']:
+            return
+        self.push_undo()
+        step.raw_img = downscale_image(dlg.frame, step.meta.get('capture_scale', 1.0))
+        step.meta = dict(step.meta) # Undo snapshots share the meta dict
+        step.meta['timeline'] = dict(timeline, frame=dlg.picked)
+        step.meta.pop('changes', None)
+        self.update_thumbnails()
+        self.load_step(self.current_idx)
+
     def on_export_clicked(self):
         self.save_current_state()
         self.save_cb(self.steps, self.global_layers, self.global_crop)
@@ -2150,32 +2539,22 @@ class ProEditor(QMainWindow):
             self.setWindowTitle(f"ClickStep Guide - {name}")
         
         base_path = os.path.join(self.get_project_dir(), name)
-        img_path = os.path.join(base_path, "images")
         if os.path.exists(base_path) and (save_as is True):
              # Maybe warn? But standard Save As just overwrites/uses that name
              pass
-             
-        os.makedirs(img_path, exist_ok=True)
-        
-        data = {
-            "global_crop": self.global_crop,
-            "global_layers": [{"type": l.type, "data": l.data, "label": l.label, "uid": l.uid} for l in self.global_layers],
-            "steps": []
-        }
-        
-        for i, s in enumerate(self.steps):
-            filename = f"step_{i}.png"
-            cv2.imwrite(os.path.join(img_path, filename), s.raw_img)
-            
-            data["steps"].append({
-                "image": filename,
-                "description": s.description,
-                "layers": [{"type": l.type, "data": l.data, "label": l.label} for l in s.layers]
-            })
-            
-        with open(os.path.join(base_path, "project.json"), "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
         
+        # Saved in the background from a snapshot, editing continues meanwhile
+        storage = open_project_storage(self.get_project_dir(), name, self.settings.project_format, self.settings.image_codec)
+        self.saver.submit(name, storage, self.capture_snapshot())
+        self.statusBar().showMessage(f"Projekt '{name}' wird gespeichert...")
+
+    def on_save_progress(self, done, total):
+        self.statusBar().showMessage(f"Speichern... {done}/{total} Bilder")
+
+    def on_save_finished(self, name, error):
+        if error:
+            QMessageBox.critical(self, "Fehler", f"Projekt '{name}' konnte nicht gespeichert werden: {error}")
+            return
         # Use simple label overlay or status bar instead of annoying popup?
         # For now, just status bar, or a non-blocking modern toast
         self.statusBar().showMessage(f"Projekt '{name}' erfolgreich gespeichert!", 3000)
@@ -2398,6 +2777,7 @@ class ProEditor(QMainWindow):
         
         new_layers = []
         new_globals = []
+        click_positions = {} # click layer uid -> moved position
         
         # Offset handling (add crop offset back to coordinates for storage)
         ox = getattr(self, 'current_offset_x', 0)
@@ -2524,16 +2904,17 @@ class ProEditor(QMainWindow):
             elif item.item_type == 'click':
                 # Preserve click from current step but update position if moved
                 p = item.boundingRect().center() + item.pos()
-                self.steps[self.current_idx].x = int(p.x()+ox)
-                self.steps[self.current_idx].y = int(p.y()+oy)
-                # Update the click layer separately or just keep it
-        
-        self.steps[self.current_idx].layers = [l for l in self.steps[self.current_idx].layers if l.type == 'click']
-        for l in self.steps[self.current_idx].layers:
-            if l.type == 'click':
-                l.data['x'] = self.steps[self.current_idx].x
-                l.data['y'] = self.steps[self.current_idx].y
-        self.steps[self.current_idx].layers.extend(new_layers)
+                click_positions[uid] = (int(p.x()+ox), int(p.y()+oy))
+        
+        step = self.steps[self.current_idx]
+        step.layers = [l for l in step.layers if l.type == 'click']
+        for i, l in enumerate(step.layers):
+            if l.uid in click_positions:
+                l.data['x'], l.data['y'] = click_positions[l.uid]
+            if i == 0:
+                # The first click defines the step position (merged clicks add more markers)
+                step.x, step.y = l.data['x'], l.data['y']
+        step.layers.extend(new_layers)
         
         if new_globals:
             # Smart update using UUIDs
@@ -2584,7 +2965,10 @@ class ProEditor(QMainWindow):
             # Step(raw_img, x, y, label)
             import copy
             # We need to recreate the Step object to detach layer list, but keep image ref
-            new_step = Step(s.raw_img, s.x, s.y, getattr(s, 'label', ""))
+            new_step = Step(s.image_ref, s.x, s.y, getattr(s, 'label', ""))
+            new_step.hover_ref = s.hover_ref
+            new_step.meta = copy.deepcopy(s.meta) # Detached: the GUI thread keeps updating the live dict while a save runs
+            new_step.description = s.description
             
             # Manually copy layers
             new_step.layers = []
@@ -3168,35 +3552,57 @@ class ProEditor(QMainWindow):
             self.steps[self.current_idx].description = self.txt_description.toPlainText()
 
     def update_thumbnails(self):
+        # Never decodes: images that are not in memory yet get their icon from the prefetch
+        store = StepImageStore.instance()
         self.thumb_list.clear()
+        self.thumb_pending = []
         for i, s in enumerate(self.steps):
-            # Create thumbnail with number
-            if s.raw_img is not None:
-                try:
-                    h, w = s.raw_img.shape[:2]
-                    thumb_h = 64
-                    if h > 0:
-                        thumb_w = int(w * thumb_h / h)
-                        small = cv2.resize(s.raw_img, (thumb_w, thumb_h))
-                        
-                        # Add "#1" Badge background
-                        cv2.rectangle(small, (0, 0), (28, 22), (20, 20, 20), -1)
-                        # Add Number
-                        cv2.putText(small, str(i+1), (5, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
-                        
-                        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-                        qimg = QImage(rgb.data, thumb_w, thumb_h, thumb_w*3, QImage.Format.Format_RGB888)
-                        icon = QIcon(QPixmap.fromImage(qimg))
-                        
-                        item = QListWidgetItem(icon, f"Schritt {i+1}")
-                        self.thumb_list.addItem(item)
-                    else:
-                        self.thumb_list.addItem(f"Schritt {i+1}")
-                except Exception as e:
-                    print(f"Thumb error: {e}")
-                    self.thumb_list.addItem(f"Schritt {i+1}")
+            item = QListWidgetItem(f"Schritt {i+1}")
+            small = store.thumbnail(s.image_ref)
+            if small is not None:
+                item.setIcon(self.thumbnail_icon(small, i))
+            elif s.image_ref is not None:
+                self.thumb_pending.append(i)
+            self.thumb_list.addItem(item)
+        if self.thumb_pending:
+            self.thumb_timer.start()
+
+    def thumbnail_icon(self, small, i):
+        try:
+            small = small.copy()
+            thumb_h, thumb_w = small.shape[:2]
+            # Add "#1" Badge background
+            cv2.rectangle(small, (0, 0), (28, 22), (20, 20, 20), -1)
+            # Add Number
+            cv2.putText(small, str(i+1), (5, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+            
+            rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+            qimg = QImage(rgb.data, thumb_w, thumb_h, thumb_w*3, QImage.Format.Format_RGB888)
+            return QIcon(QPixmap.fromImage(qimg))
+        except Exception as e:
+            print(f"Thumb error: {e}")
+            return QIcon()
+
+    def fill_thumbnails(self):
+        """Set the icons the background prefetch has made thumbnails for since the last tick"""
+        store = StepImageStore.instance()
+        busy = store.prefetch_busy
+        pending = []
+        for i in self.thumb_pending:
+            if i >= len(self.steps) or i >= self.thumb_list.count(): continue
+            small = store.thumbnail(self.steps[i].image_ref)
+            if small is not None:
+                self.thumb_list.item(i).setIcon(self.thumbnail_icon(small, i))
             else:
-                self.thumb_list.addItem(f"Schritt {i+1}")
+                pending.append(i)
+        self.thumb_pending = pending if busy else [] # Failed images keep the text-only entry
+        if not self.thumb_pending:
+            self.thumb_timer.stop()
+
+    def prefetch_around(self, idx):
+        """Decode the images next to the current step first, then the rest"""
+        order = sorted(range(len(self.steps)), key=lambda i: (abs(i - idx), i < idx))
+        StepImageStore.instance().prefetch(self.steps[i].image_ref for i in order if i != idx)
 
     def load_step(self, idx):
         if idx < 0 or idx >= len(self.steps): return
@@ -3207,6 +3613,7 @@ class ProEditor(QMainWindow):
         
         # 1. Background Image - Handle Global Crop
         img = step.raw_img
+        self.prefetch_around(idx)
         
         # Calculate offsets based on crop
         offset_x, offset_y = 0, 0
@@ -3310,6 +3717,7 @@ class ProEditor(QMainWindow):
         for l in step.layers:
             if l.type == 'click':
                 item = ClickMarkerItem(l.data['x']-offset_x, l.data['y']-offset_y, str(idx+1))
+                item.uid = l.uid
                 self.scene.addItem(item)
             elif l.type == 'blur':
                 c = l.data['coords']
@@ -3400,57 +3808,3075 @@ class ProEditor(QMainWindow):
         
         self.refresh_layer_list()
 
+# ==================== CAPTURE BACKENDS ====================
+
+class CaptureBackend:
+    """Base class for screen grabbers used by the recorder.
+    grab() returns a backend-native frame that stays valid after the next grab,
+    small() gives a downscaled HxWxC array of it for cheap diffs and to_bgr() converts
+    it into the BGR array stored in Step.raw_img. bytes_copied counts every pixel
+    buffer copy made on the way (used by the capture benchmark)."""
+    name = "base"
+
+    def __init__(self):
+        self.bytes_copied = 0
+
+    def grab(self, bbox=None):
+        raise NotImplementedError
+
+    def small(self, frame, stride):
+        return frame[::stride, ::stride]
+
+    def to_bgr(self, frame):
+        return frame
+
+    def crop(self, frame, box):
+        """box is (left, top, right, bottom) relative to the frame"""
+        l, t, r, b = box
+        return frame[t:b, l:r]
+
+    def close(self):
+        pass
+
+class ImageGrabBackend(CaptureBackend):
+    """PIL.ImageGrab (GDI on Windows, XGetImage on X11). Portable but always grabs the
+    full screen internally and crops afterwards."""
+    name = "imagegrab"
+
+    def grab(self, bbox=None):
+        raw = ImageGrab.grab(bbox=bbox, all_screens=True) if bbox else ImageGrab.grab()
+        self.bytes_copied += raw.width * raw.height * 3
+        return raw
+
+    def small(self, frame, stride):
+        # Nearest-neighbour resize only touches the sampled pixels
+        size = (max(1, frame.width // stride), max(1, frame.height // stride))
+        return np.asarray(frame.resize(size, Image.Resampling.NEAREST))
+
+    def to_bgr(self, frame):
+        # Let PIL pack straight into BGR: one copy instead of np.array + cvtColor
+        data = frame.tobytes("raw", "BGR")
+        self.bytes_copied += len(data)
+        return np.frombuffer(data, np.uint8).reshape(frame.height, frame.width, 3)
+
+    def crop(self, frame, box):
+        return frame.crop(box)
+
+class XImage(ctypes.Structure):
+    """Leading fields of Xlib's XImage (only what the SHM grabber reads)"""
+    _fields_ = [("width", ctypes.c_int), ("height", ctypes.c_int), ("xoffset", ctypes.c_int),
+                ("format", ctypes.c_int), ("data", ctypes.c_void_p), ("byte_order", ctypes.c_int),
+                ("bitmap_unit", ctypes.c_int), ("bitmap_bit_order", ctypes.c_int), ("bitmap_pad", ctypes.c_int),
+                ("depth", ctypes.c_int), ("bytes_per_line", ctypes.c_int), ("bits_per_pixel", ctypes.c_int),
+                ("red_mask", ctypes.c_ulong), ("green_mask", ctypes.c_ulong), ("blue_mask", ctypes.c_ulong)]
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [("shmseg", ctypes.c_ulong), ("shmid", ctypes.c_int),
+                ("shmaddr", ctypes.c_void_p), ("readOnly", ctypes.c_int)]
+
+class X11ShmBackend(CaptureBackend):
+    """X11 MIT-SHM grabber: the X server writes the requested area straight into a
+    shared memory segment, so only the bbox is transferred and the single copy is the
+    BGRX -> BGR repack into an owned array. Only 24/32 bit TrueColor visuals with 32 bit
+    little-endian BGRX pixels are supported, other formats are rejected when opening."""
+    name = "x11shm"
+    ZPixmap = 2
+    AllPlanes = 0xFFFFFFFF
+    LSBFirst = 0
+
+    def __init__(self):
+        super().__init__()
+        from ctypes.util import find_library
+        if os.name == 'nt' or not os.environ.get("DISPLAY"):
+            raise RuntimeError("X11 display not available")
+        if os.environ.get("WAYLAND_DISPLAY"):
+            print("x11shm under XWayland: native Wayland windows are captured black")
+        self.xlib = ctypes.CDLL(find_library("X11"))
+        self.xext = ctypes.CDLL(find_library("Xext"))
+        self.libc = ctypes.CDLL(find_library("c"))
+        
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        self.xlib.XRootWindow.restype = ctypes.c_ulong
+        self.xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XDefaultVisual.restype = ctypes.c_void_p
+        self.xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        self.xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+        self.xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        self.xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+        self.xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                              ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint]
+        self.xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        self.xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+        self.xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(XImage),
+                                           ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        self.libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        self.libc.shmat.restype = ctypes.c_void_p
+        self.libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        self.libc.shmdt.argtypes = [ctypes.c_void_p]
+        self.libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        
+        self.display = self.xlib.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError("XOpenDisplay failed")
+        if not self.xext.XShmQueryExtension(self.display):
+            self.xlib.XCloseDisplay(self.display)
+            raise RuntimeError("MIT-SHM extension not available")
+        
+        screen = self.xlib.XDefaultScreen(self.display)
+        self.root = self.xlib.XRootWindow(self.display, screen)
+        self.visual = self.xlib.XDefaultVisual(self.display, screen)
+        self.depth = self.xlib.XDefaultDepth(self.display, screen)
+        self.screen_size = (self.xlib.XDisplayWidth(self.display, screen), self.xlib.XDisplayHeight(self.display, screen))
+        self.lock = threading.Lock() # One display connection, grabs may come from several threads
+        self.images = {} # (w, h) -> (XImage*, XShmSegmentInfo, buffer view)
+        try:
+            if self.depth not in (24, 32):
+                raise RuntimeError(f"unsupported display depth {self.depth}")
+            self.shm_image(1, 1) # Checks the pixel format before 'auto' settles on this backend
+        except Exception:
+            self.close()
+            raise
+
+    def shm_image(self, w, h):
+        """Shared memory XImage for one capture size, created on first use"""
+        if (w, h) in self.images:
+            return self.images[(w, h)]
+        
+        info = XShmSegmentInfo()
+        ximg = self.xext.XShmCreateImage(self.display, self.visual, self.depth, self.ZPixmap, None, ctypes.byref(info), w, h)
+        if not ximg:
+            raise RuntimeError("XShmCreateImage failed")
+        img = ximg.contents
+        if (img.bits_per_pixel != 32 or img.byte_order != self.LSBFirst
+                or (img.red_mask, img.green_mask, img.blue_mask) != (0xFF0000, 0xFF00, 0xFF)):
+            fmt = f"{img.bits_per_pixel} bpp, masks {img.red_mask:x}/{img.green_mask:x}/{img.blue_mask:x}, byte order {img.byte_order}"
+            self.xlib.XDestroyImage(ximg)
+            raise RuntimeError(f"unsupported pixel format ({fmt})")
+        size = ximg.contents.bytes_per_line * h
+        info.shmid = self.libc.shmget(0, size, 0o1000 | 0o600) # IPC_PRIVATE, IPC_CREAT
+        if info.shmid < 0:
+            self.xlib.XDestroyImage(ximg)
+            raise RuntimeError("shmget failed")
+        info.shmaddr = self.libc.shmat(info.shmid, None, 0)
+        if info.shmaddr in (None, ctypes.c_void_p(-1).value): # (void *) -1 on failure
+            self.libc.shmctl(info.shmid, 0, None) # IPC_RMID
+            self.xlib.XDestroyImage(ximg)
+            raise RuntimeError("shmat failed")
+        ximg.contents.data = info.shmaddr
+        info.readOnly = 0
+        self.xext.XShmAttach(self.display, ctypes.byref(info))
+        self.xlib.XSync(self.display, 0)
+        self.libc.shmctl(info.shmid, 0, None) # IPC_RMID: segment disappears once everyone detached
+        
+        bpl = ximg.contents.bytes_per_line
+        buf = (ctypes.c_uint8 * size).from_address(info.shmaddr)
+        view = np.ctypeslib.as_array(buf).reshape(h, bpl // 4, 4)[:, :w, :3] # BGRX -> BGR view
+        self.images[(w, h)] = (ximg, info, view)
+        return self.images[(w, h)]
+
+    def grab(self, bbox=None):
+        if bbox is None:
+            bbox = (0, 0, self.screen_size[0], self.screen_size[1])
+        # Requests outside the root window are a fatal X error, clamp first
+        sw, sh = self.screen_size
+        l, t = min(max(0, bbox[0]), sw - 1), min(max(0, bbox[1]), sh - 1)
+        r, b = max(l + 1, min(sw, bbox[2])), max(t + 1, min(sh, bbox[3])) # At least one pixel, even fully off-screen
+        with self.lock:
+            ximg, info, view = self.shm_image(r - l, b - t)
+            if not self.xext.XShmGetImage(self.display, self.root, ximg, l, t, self.AllPlanes):
+                raise RuntimeError("XShmGetImage failed")
+            frame = np.ascontiguousarray(view) # The segment is reused by the next grab
+        self.bytes_copied += frame.nbytes
+        return frame
+
+    def close(self):
+        with self.lock:
+            for ximg, info, view in self.images.values():
+                self.xext.XShmDetach(self.display, ctypes.byref(info))
+                self.xlib.XDestroyImage(ximg)
+                self.libc.shmdt(info.shmaddr)
+            self.images = {}
+            if self.display:
+                self.xlib.XCloseDisplay(self.display)
+                self.display = None
+
+class SyntheticCaptureBackend(CaptureBackend):
+    """Frames from image files (a directory or list of paths) or generated UI-like
+    test frames. Coordinates are relative to the frame, so a bbox crops it. Used by
+    the benchmark and for testing the recorder without a real desktop."""
+    name = "synthetic"
+
+    def __init__(self, source=None, size=(1920, 1080), count=8, cycle=True):
+        super().__init__()
+        self.frames = []
+        if source:
+            paths = source
+            if isinstance(source, str):
+                paths = [os.path.join(source, f) for f in sorted(os.listdir(source))
+                         if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.webp'))]
+            for path in paths:
+                img = cv2.imread(path)
+                if img is not None:
+                    self.frames.append(img)
+        if not self.frames:
+            self.frames = [self.make_frame(size, i) for i in range(count)]
+        self.index = 0
+        self.cycle = cycle
+
+    @staticmethod
+    def make_frame(size, seed):
+        """Flat UI-like test frame: background, title bar, sidebar and a few 'dialogs'"""
+        w, h = size
+        rng = np.random.default_rng(seed)
+        img = np.full((h, w, 3), 240, dtype=np.uint8)
+        img[:40] = (60, 60, 60)
+        img[40:, :220] = (225, 225, 225)
+        # Dialog corners right of the sidebar and below the title bar, ranges shrink with small frames
+        left, top = min(240, w // 4), min(60, h // 4)
+        for _ in range(6):
+            x1 = int(rng.integers(left, max(left + 1, w - 200)))
+            y1 = int(rng.integers(top, max(top + 1, h - 150)))
+            color = tuple(int(c) for c in rng.integers(80, 255, 3))
+            cv2.rectangle(img, (x1, y1), (x1 + 180, y1 + 120), color, -1)
+            cv2.putText(img, f"Frame {seed}", (x1 + 10, y1 + 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+        return img
+
+    def advance(self):
+        self.index = (self.index + 1) % len(self.frames) if self.cycle else min(self.index + 1, len(self.frames) - 1)
+
+    def grab(self, bbox=None):
+        img = self.frames[self.index]
+        if self.cycle:
+            self.advance()
+        if bbox:
+            l, t, r, b = bbox
+            img = img[max(0, t):b, max(0, l):r]
+        frame = img.copy()
+        self.bytes_copied += frame.nbytes
+        return frame
+
+CAPTURE_BACKENDS = {
+    "imagegrab": ImageGrabBackend,
+    "x11shm": X11ShmBackend,
+    "synthetic": SyntheticCaptureBackend,
+}
+
+def create_capture_backend(name="auto"):
+    """Instantiate a capture backend by name; 'auto' prefers the fastest available one.
+    Falls back to ImageGrab if the requested backend can't be initialised."""
+    if name == "auto":
+        # Under XWayland the X root window only shows X11 clients, native Wayland windows come out black
+        x11 = sys.platform.startswith("linux") and os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY")
+        name = "x11shm" if x11 else "imagegrab"
+    try:
+        return CAPTURE_BACKENDS[name]()
+    except Exception as e:
+        if name != "imagegrab":
+            print(f"Capture backend '{name}' unavailable ({e}), falling back to imagegrab")
+        return ImageGrabBackend()
+
+def run_capture_benchmark(backends=None, seconds=3.0, bbox=None):
+    """Measure grabs per second, latency percentiles and bytes copied per grab.
+    Each iteration is a full grab + BGR conversion, i.e. what one recorded step costs."""
+    names = backends or list(CAPTURE_BACKENDS)
+    print(f"{'Backend':<12}{'Grabs/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'MB/grab':>10}")
+    results = {}
+    for name in names:
+        try:
+            backend = CAPTURE_BACKENDS[name]()
+        except Exception as e:
+            print(f"{name:<12}unavailable: {e}")
+            continue
+        try:
+            backend.to_bgr(backend.grab(bbox)) # Warm up (allocations, shm setup)
+            backend.bytes_copied = 0
+            latencies = []
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                t0 = time.perf_counter()
+                backend.to_bgr(backend.grab(bbox))
+                latencies.append(time.perf_counter() - t0)
+            total = time.perf_counter() - start
+        finally:
+            backend.close()
+        
+        lat_ms = np.array(latencies) * 1000
+        p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99])
+        mb = backend.bytes_copied / len(latencies) / (1024 * 1024)
+        results[name] = {'fps': len(latencies) / total, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'mb_per_grab': mb}
+        print(f"{name:<12}{len(latencies) / total:>10.1f}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{mb:>10.2f}")
+    return results
+
+# ==================== SESSION JOURNAL ====================
+
+class SessionJournal:
+    """Append-only on-disk journal of a recording session.
+    Every step is queued as soon as it is captured; a writer thread encodes the PNGs
+    (off the capture and UI threads) and appends one JSON line per step state to
+    journal.jsonl, fsync'ed so a crash loses at most the step being written.
+    Changes to a step (typed text, merged clicks) are appended as a new record for the
+    same index - on recovery the last record per index wins."""
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.join(path, "images"), exist_ok=True)
+        self.queue = queue.Queue()
+        self.encoded = {} # image key -> (handle, filename), shared images are written once
+        self.thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def root():
+        return os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "journal")
+
+    @classmethod
+    def create(cls):
+        return cls(os.path.join(cls.root(), f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"))
+
+    @classmethod
+    def find_interrupted(cls):
+        """Journals of sessions that were never saved or discarded (newest first)"""
+        root = cls.root()
+        if not os.path.exists(root): return []
+        paths = [os.path.join(root, d) for d in os.listdir(root)
+                 if os.path.exists(os.path.join(root, d, "journal.jsonl"))]
+        return sorted(paths, reverse=True)
+
+    def record_step(self, index, step):
+        """Queue the current state of a step (called from the UI thread)"""
+        record = {
+            "index": index,
+            "x": step.x, "y": step.y,
+            "description": step.description,
+            "layers": [{"type": l.type, "data": l.data, "label": l.label} for l in step.layers],
+            "meta": step.meta
+        }
+        # Serialize now, the step may be edited while the writer is busy
+        self.queue.put((json.dumps(record, default=str), step.image_ref, step.hover_ref))
+
+    def image_file(self, ref):
+        if ref is None: return None
+        known = self.encoded.get(ref.key)
+        if known:
+            return known[1]
+        filename = f"img_{uuid.uuid4().hex[:10]}.png"
+        cv2.imwrite(os.path.join(self.path, "images", filename), ref.array())
+        self.encoded[ref.key] = (ref, filename) # Holding the handle keeps its key from being reused
+        return filename
+
+    def writer_loop(self):
+        with open(os.path.join(self.path, "journal.jsonl"), "a", encoding="utf-8") as f:
+            while True:
+                item = self.queue.get()
+                if item is None: break
+                line, img, hover = item
+                try:
+                    record = json.loads(line)
+                    record["image"] = self.image_file(img)
+                    record["hover_image"] = self.image_file(hover)
+                    # Image files are complete before the record referencing them is written
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception as e:
+                    print(f"Journal write failed: {e}")
+
+    def close(self):
+        """Finish pending writes, the journal stays on disk"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def discard(self):
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def load(path):
+        """Rebuild steps from a journal, ignoring a torn last line"""
+        records = {}
+        with open(os.path.join(path, "journal.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record["index"]] = record
+        
+        steps = []
+        decoded = {}
+        def read(filename):
+            if not filename: return None
+            if filename not in decoded:
+                decoded[filename] = StepImageStore.instance().put(cv2.imread(os.path.join(path, "images", filename)))
+            return decoded[filename]
+        
+        for index in sorted(records):
+            r = records[index]
+            img = read(r.get("image"))
+            if img is None: continue
+            step = Step(img, r["x"], r["y"], r.get("description", ""))
+            step.layers = [Layer(l['type'], l['data'], l.get('label', 'Layer')) for l in r.get("layers", [])]
+            step.hover_img = read(r.get("hover_image"))
+            step.meta = r.get("meta", {})
+            steps.append(step)
+        return steps
+
+# ==================== STEP IMAGE STORE ====================
+
+class StepImage:
+    """Handle to one screenshot in the StepImageStore, steps sharing a handle share the image"""
+    __slots__ = ("key", "shape", "digest", "origin", "__weakref__")
+
+    def __init__(self, key, shape):
+        self.key = key
+        self.shape = shape
+        self.digest = None # Content hash, set by ProjectStorage
+        self.origin = None # Project file holding this image
+
+    def array(self):
+        return StepImageStore.instance().get(self)
+
+class StepImageStore:
+    """Keeps step screenshots within a memory budget.
+    - hot: decoded BGR arrays, up to hot_mb
+    - warm: PNG bytes in RAM (fast compression level), up to warm_mb
+    - cold: PNG files in a temporary spill directory
+    - files: images of an opened project are decoded from the project file (or a
+      ProjectBlob in a container) on first use (put_file) and simply dropped from hot again
+    The least recently used images move down a tier when a tier is over budget; get()
+    decodes them again. Images are treated as immutable - replace them via Step.raw_img.
+    An entry is freed when its last handle is garbage collected."""
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, hot_mb=1024, warm_mb=512):
+        self.lock = threading.RLock()
+        self.hot = OrderedDict()  # key -> array, least recently used first
+        self.warm = OrderedDict() # key -> png bytes
+        self.cold = {}            # key -> spill file
+        self.files = {}           # key -> project file or ProjectBlob the image can be decoded from
+        self.thumbs = {}          # key -> small thumbnail array for the step list
+        self.by_array = {}        # id(hot array) -> key, storing a stored array again returns its handle
+        self.handles = weakref.WeakValueDictionary()
+        self.hot_bytes = 0
+        self.warm_bytes = 0
+        self.spill_dir = None
+        self.next_key = 0
+        self.prefetch_gen = 0
+        self.prefetch_busy = False
+        self.configure(hot_mb, warm_mb)
+
+    def configure(self, hot_mb, warm_mb):
+        with self.lock:
+            self.hot_budget = hot_mb * 1024 * 1024
+            self.warm_budget = warm_mb * 1024 * 1024
+            self.trim()
+
+    def put(self, img):
+        """Store an image and return its handle (handles are passed through)"""
+        if img is None or isinstance(img, StepImage):
+            return img
+        with self.lock:
+            key = self.by_array.get(id(img))
+            if key is not None and self.hot.get(key) is img and key in self.handles:
+                return self.handles[key] # Shared buffer (e.g. unchanged screen)
+            
+            self.next_key += 1
+            key = self.next_key
+            handle = StepImage(key, img.shape)
+            self.handles[key] = handle
+            weakref.finalize(handle, self.discard, key)
+            self.add_hot(key, img)
+            self.trim()
+            return handle
+
+    @staticmethod
+    def header_shape(header):
+        """Image shape from the first 25 bytes of a PNG, lossless WebP or tile map (None for other files)"""
+        if header[:8] == b"\x89PNG\r\n\x1a\n":
+            return (int.from_bytes(header[20:24], "big"), int.from_bytes(header[16:20], "big"), 3) # cv2.imread gives BGR
+        if header[:4] == b"RIFF" and header[8:16] == b"WEBPVP8L": # Lossless WebP: 14 bit width-1, height-1
+            bits = int.from_bytes(header[21:25], "little")
+            return (((bits >> 14) & 0x3FFF) + 1, (bits & 0x3FFF) + 1, 3)
+        if header[:8] == TileStore.MAGIC:
+            return TileStore.map_shape(header)
+        return None
+
+    def put_file(self, path, shape=None):
+        """Handle for a PNG, lossless WebP or tile map that is only decoded when its pixels are needed.
+        The shape comes from the caller or the file header; other files are decoded right away."""
+        if shape is None:
+            try:
+                shape = self.header_shape(self.read_source(path, 25))
+            except (OSError, sqlite3.Error):
+                pass
+        if shape is None:
+            return self.put(self.decode(None, path))
+        with self.lock:
+            self.next_key += 1
+            key = self.next_key
+            handle = StepImage(key, shape)
+            self.handles[key] = handle
+            weakref.finalize(handle, self.discard, key)
+            self.files[key] = path
+            return handle
+
+    def get(self, handle):
+        key = handle.key
+        with self.lock:
+            img = self.hot.get(key)
+            if img is not None:
+                self.hot.move_to_end(key)
+                return img
+            
+            data = self.warm.get(key)
+            if data is not None:
+                self.warm.move_to_end(key)
+            elif key in self.cold:
+                with open(self.cold[key], "rb") as f:
+                    data = f.read()
+            path = self.files.get(key)
+        # Decode outside the lock, the prefetch thread and the UI do not wait for each other
+        img = self.decode(data, path)
+        with self.lock:
+            known = self.hot.get(key)
+            if known is not None: # Decoded by the other thread meanwhile
+                return known
+            self.add_hot(key, img)
+            self.trim()
+            return img
+
+    @staticmethod
+    def read_source(path, size=-1):
+        if isinstance(path, ProjectBlob):
+            return ProjectContainer.read_blob(path, size)
+        with open(path, "rb") as f:
+            return f.read(size)
+
+    @classmethod
+    def decode(cls, data, path):
+        if data is not None:
+            return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        if isinstance(path, ProjectBlob) or path.endswith(TileStore.EXT):
+            return decode_project_image(cls.read_source(path), path)
+        return cv2.imread(path)
+
+    def thumbnail(self, handle, height=64):
+        """Small copy for the step list; None until the image was decoded once (see prefetch)"""
+        if handle is None: return None
+        small = self.thumbs.get(handle.key)
+        if small is None:
+            with self.lock:
+                img = self.hot.get(handle.key)
+            if img is not None:
+                small = self.thumbs[handle.key] = self.make_thumbnail(img, height)
+        return small
+
+    @staticmethod
+    def make_thumbnail(img, height=64):
+        h, w = img.shape[:2]
+        return cv2.resize(img, (max(1, int(w * height / max(h, 1))), height), interpolation=cv2.INTER_AREA)
+
+    def prefetch(self, handles):
+        """Decode images in the given order in a background thread (replacing a running prefetch).
+        Images are kept decoded while they fit the hot budget; every image gets a thumbnail."""
+        handles = list({h.key: h for h in handles if h is not None}.values())
+        with self.lock:
+            self.prefetch_gen += 1
+            self.prefetch_busy = True
+            gen = self.prefetch_gen
+        threading.Thread(target=self.prefetch_loop, args=(handles, gen), daemon=True).start()
+
+    def prefetch_loop(self, handles, gen):
+        for handle in handles:
+            key = handle.key
+            with self.lock:
+                if gen != self.prefetch_gen: return # Superseded by a newer prefetch
+                is_hot = key in self.hot
+                fits = self.hot_bytes + int(np.prod(handle.shape)) <= self.hot_budget
+                data = self.warm.get(key)
+                path = self.cold.get(key) or self.files.get(key)
+            if key in self.thumbs and (is_hot or not fits):
+                continue
+            try:
+                if fits or is_hot:
+                    img = self.get(handle)
+                elif data is not None:
+                    img = self.decode(data, None) # Thumbnail only, would push out images in use
+                else:
+                    img = self.decode(None, path)
+                if img is not None and key not in self.thumbs:
+                    self.thumbs[key] = self.make_thumbnail(img)
+            except Exception as e:
+                print(f"Prefetch failed: {e}")
+        with self.lock:
+            if gen == self.prefetch_gen:
+                self.prefetch_busy = False
+
+    def release_file(self, path, read=None):
+        """A project file (or blob) is about to be deleted: images it backs move to the memory tiers.
+        read() returns the file's bytes where the caller has to read them itself."""
+        with self.lock:
+            keys = [k for k, p in self.files.items() if p == path]
+            for key in keys:
+                self.files.pop(key)
+                if key in self.handles and key not in self.hot:
+                    # Saved bytes may be a tile map, only decode_project_image() knows every codec
+                    img = decode_project_image(read(), path) if read else self.decode(None, path)
+                    if img is None:
+                        print(f"Image could not be kept: {path}")
+                        continue
+                    self.add_hot(key, img)
+            self.trim() # Images that no longer have a file are compressed like recorded ones
+
+    def add_hot(self, key, img):
+        self.hot[key] = img
+        self.by_array[id(img)] = key
+        self.hot_bytes += img.nbytes
+
+    def trim(self):
+        # The most recently used image always stays decoded
+        while self.hot_bytes > self.hot_budget and len(self.hot) > 1:
+            key, img = self.hot.popitem(last=False)
+            self.hot_bytes -= img.nbytes
+            self.by_array.pop(id(img), None)
+            if key not in self.warm and key not in self.cold and key not in self.files:
+                ok, buf = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+                self.warm[key] = buf.tobytes()
+                self.warm_bytes += len(self.warm[key])
+        
+        while self.warm_bytes > self.warm_budget and self.warm:
+            key, data = self.warm.popitem(last=False)
+            self.warm_bytes -= len(data)
+            if key not in self.cold:
+                self.cold[key] = self.spill(key, data)
+
+    def spill(self, key, data):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="clickstep_images_")
+            atexit.register(shutil.rmtree, self.spill_dir, True)
+        path = os.path.join(self.spill_dir, f"{key}.png")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def discard(self, key):
+        with self.lock:
+            img = self.hot.pop(key, None)
+            if img is not None:
+                self.hot_bytes -= img.nbytes
+                self.by_array.pop(id(img), None)
+            data = self.warm.pop(key, None)
+            if data is not None:
+                self.warm_bytes -= len(data)
+            self.files.pop(key, None) # Project files belong to the project
+            self.thumbs.pop(key, None)
+            path = self.cold.pop(key, None)
+            if path:
+                try: os.remove(path)
+                except OSError: pass
+
+# ==================== PROJECT STORAGE ====================
+
+class ImageCodec:
+    """Lossless encoding of step images in a project. The file extension records the
+    format and every PNG variant decodes alike, so a project may mix codecs.
+    max_side: largest width/height the format can hold, bigger images are saved as PNG."""
+    def __init__(self, ext, params=(), max_side=None):
+        self.ext = ext
+        self.params = list(params)
+        self.max_side = max_side
+
+    def for_image(self, img):
+        """Codec that actually encodes img, its ext names the saved file"""
+        if self.max_side is None or max(img.shape[:2]) <= self.max_side:
+            return self
+        return IMAGE_CODECS["png"]
+
+    def encode(self, img, root=None):
+        """root: projects root of the saving project (used by codecs with shared state)"""
+        ok, buf = cv2.imencode(self.ext, img, self.params)
+        if not ok:
+            raise ValueError(f"{self.ext} encoding failed")
+        return buf.tobytes()
+
+    def decode(self, data, root=None):
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+class TileStore:
+    """Tiles of step images shared by all projects under one projects root (tiles.db there).
+    The "tiles" codec saves an image as a tile map - its size plus the hash of every
+    TILE x TILE block - and each distinct block is stored once as a small PNG, however
+    many steps and projects show it (toolbars, sidebars, logos).
+    Tiles are never removed on save; collect_garbage() sweeps the unreferenced ones."""
+    TILE = 64
+    MAGIC = b"CSGTILE1"
+    EXT = ".tiles"
+    _instances = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def for_root(cls, root):
+        root = os.path.abspath(root)
+        with cls._lock:
+            if root not in cls._instances:
+                cls._instances[root] = cls(root)
+            return cls._instances[root]
+
+    @classmethod
+    def for_image(cls, source):
+        """Tile store of the projects root holding an image file or ProjectBlob"""
+        if isinstance(source, ProjectBlob):
+            return cls.for_root(os.path.dirname(source.db))
+        return cls.for_root(os.path.dirname(os.path.dirname(os.path.dirname(source)))) # root/project/images/file
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.bytes_written = 0
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "tiles.db"), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS tiles (hash BLOB PRIMARY KEY, data BLOB)")
+        self.db.commit()
+
+    @staticmethod
+    def tile_hash(tile):
+        tile = np.ascontiguousarray(tile)
+        h = hashlib.blake2b(str(tile.shape).encode(), digest_size=16)
+        h.update(tile.data)
+        return h.digest()
+
+    def fetch(self, sql, hashes):
+        """Rows for a set of tile hashes (batched below SQLite's variable limit)"""
+        hashes = list(hashes)
+        rows = []
+        with self.lock:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                rows += self.db.execute(sql.format(",".join("?" * len(chunk))), chunk).fetchall()
+        return rows
+
+    def encode(self, img):
+        """Store the image's new tiles, returns its tile map"""
+        t = self.TILE
+        h, w = img.shape[:2]
+        tiles = [img[y:y + t, x:x + t] for y in range(0, h, t) for x in range(0, w, t)]
+        hashes = [self.tile_hash(tile) for tile in tiles]
+        known = {row[0] for row in self.fetch("SELECT hash FROM tiles WHERE hash IN ({})", set(hashes))}
+        new = {}
+        for tile_hash, tile in zip(hashes, tiles):
+            if tile_hash not in known and tile_hash not in new:
+                ok, buf = cv2.imencode(".png", tile, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+                new[tile_hash] = buf.tobytes()
+        if new:
+            with self.lock, self.db: # Committed before the map that references them is written
+                self.db.executemany("INSERT OR IGNORE INTO tiles VALUES (?, ?)", new.items())
+                self.bytes_written += sum(len(data) for data in new.values())
+        return self.MAGIC + struct.pack(">IIH", h, w, t) + b"".join(hashes)
+
+    @classmethod
+    def map_shape(cls, data):
+        h, w, t = struct.unpack(">IIH", data[8:18])
+        return (h, w, 3)
+
+    def decode(self, data):
+        h, w, t = struct.unpack(">IIH", data[8:18])
+        hashes = [data[i:i + 16] for i in range(18, len(data), 16)]
+        blobs = dict(self.fetch("SELECT hash, data FROM tiles WHERE hash IN ({})", set(hashes)))
+        img = np.empty((h, w, 3), np.uint8)
+        decoded = {}
+        i = 0
+        for y in range(0, h, t):
+            for x in range(0, w, t):
+                tile = decoded.get(hashes[i])
+                if tile is None:
+                    tile = decoded[hashes[i]] = cv2.imdecode(np.frombuffer(blobs[hashes[i]], np.uint8), cv2.IMREAD_COLOR)
+                img[y:y + t, x:x + t] = tile
+                i += 1
+        return img
+
+    def tile_maps(self):
+        """Every tile map saved in a project under the root"""
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(ProjectContainer.EXTENSION):
+                try:
+                    db = sqlite3.connect(entry.path)
+                    try:
+                        for (data,) in db.execute("SELECT data FROM blobs WHERE ext = ?", (self.EXT,)):
+                            yield data
+                    finally:
+                        db.close()
+                except sqlite3.Error:
+                    pass # Container from before codecs, no tiles
+            elif entry.is_dir() and os.path.isdir(os.path.join(entry.path, "images")):
+                for f in os.scandir(os.path.join(entry.path, "images")):
+                    if f.name.endswith(self.EXT):
+                        with open(f.path, "rb") as fh:
+                            yield fh.read()
+
+    def collect_garbage(self):
+        """Remove tiles no project references. Run while nothing is being saved."""
+        referenced = set()
+        for data in self.tile_maps():
+            referenced.update(data[i:i + 16] for i in range(18, len(data), 16))
+        with self.lock:
+            dead = [(h,) for (h,) in self.db.execute("SELECT hash FROM tiles") if h not in referenced]
+            with self.db:
+                self.db.executemany("DELETE FROM tiles WHERE hash = ?", dead)
+        self.db.execute("VACUUM")
+        return len(dead)
+
+class TileCodec(ImageCodec):
+    """Codec entry for the TileStore, root is the projects root of the saving project"""
+    def __init__(self):
+        super().__init__(TileStore.EXT)
+
+    def encode(self, img, root=None):
+        return TileStore.for_root(root).encode(img)
+
+    def decode(self, data, root=None):
+        return TileStore.for_root(root).decode(data)
+
+IMAGE_CODECS = {
+    "png-fast": ImageCodec(".png", [cv2.IMWRITE_PNG_COMPRESSION, 1]),
+    "png": ImageCodec(".png", [cv2.IMWRITE_PNG_COMPRESSION, 3]), # cv2.imwrite default
+    "png-max": ImageCodec(".png", [cv2.IMWRITE_PNG_COMPRESSION, 9]),
+    # Flat UI content is mostly long runs of one colour: run-length deflate is several
+    # times faster than the default strategy at a similar size
+    "png-flat": ImageCodec(".png", [cv2.IMWRITE_PNG_COMPRESSION, 1, cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]),
+    "webp": ImageCodec(".webp", [cv2.IMWRITE_WEBP_QUALITY, 101], max_side=16383), # Quality > 100 = lossless
+    "tiles": TileCodec(), # Deduplicated across all projects in the projects root
+}
+IMAGE_EXTENSIONS = sorted({c.ext for c in IMAGE_CODECS.values()})
+
+def decode_project_image(data, source):
+    """Decode a saved image in any codec; source (file or ProjectBlob) locates the tile store"""
+    if data[:8] == TileStore.MAGIC:
+        return TileStore.for_image(source).decode(data)
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+def image_name_digest(filename):
+    """Content hash from an img_<hash>.<ext> project file name (None for other names)"""
+    if not filename.startswith("img_"): return None
+    return os.path.splitext(filename)[0][4:]
+
+def run_codec_benchmark(folder=None, codecs=None, limit=None):
+    """Encode/decode time and bytes per step for each codec on a corpus of screenshots
+    (a folder of images or a project folder; generated frames if none is given)"""
+    if folder and os.path.isdir(os.path.join(folder, "images")):
+        folder = os.path.join(folder, "images")
+    if folder:
+        files = sorted(f for f in os.listdir(folder) if os.path.splitext(f)[1].lower() in (".png", ".webp", ".jpg", ".bmp"))
+        corpus = [img for img in (cv2.imread(os.path.join(folder, f)) for f in files[:limit]) if img is not None]
+    else:
+        corpus = SyntheticCaptureBackend().frames[:limit]
+    if not corpus:
+        print("No images found")
+        return {}
+    raw = sum(img.nbytes for img in corpus)
+    tile_root = tempfile.mkdtemp(prefix="clickstep_codec_bench_") # Empty tile store, dedup within the corpus only
+    print(f"{len(corpus)} images, {raw / len(corpus) / 1024:.0f} KB raw per step")
+    print(f"{'Codec':<10}{'Enc ms':>10}{'Dec ms':>10}{'KB/step':>10}{'Ratio':>8}")
+    results = {}
+    for name in codecs or list(IMAGE_CODECS):
+        codec = IMAGE_CODECS[name]
+        enc = dec = size = 0.0
+        if isinstance(codec, TileCodec): # Count the tiles written, not just the maps
+            size -= TileStore.for_root(tile_root).bytes_written
+        for img in corpus:
+            used = codec.for_image(img)
+            t0 = time.perf_counter()
+            data = used.encode(img, tile_root)
+            t1 = time.perf_counter()
+            out = used.decode(data, tile_root)
+            t2 = time.perf_counter()
+            if out is None or not np.array_equal(out, img):
+                print(f"{name}: not lossless on this corpus")
+            enc += t1 - t0
+            dec += t2 - t1
+            size += len(data)
+        if isinstance(codec, TileCodec):
+            size += TileStore.for_root(tile_root).bytes_written
+        n = len(corpus)
+        results[name] = {'encode_ms': enc / n * 1000, 'decode_ms': dec / n * 1000, 'bytes_per_step': size / n, 'ratio': raw / size}
+        r = results[name]
+        print(f"{name:<10}{r['encode_ms']:>10.1f}{r['decode_ms']:>10.1f}{r['bytes_per_step'] / 1024:>10.0f}{r['ratio']:>8.1f}")
+    TileStore._instances.pop(os.path.abspath(tile_root)).db.close()
+    shutil.rmtree(tile_root, ignore_errors=True)
+    return results
+
+class ProjectStorage:
+    """A saved project: project.json plus images/ with content-hash file names.
+    Image handles remember the file they were loaded from or saved to, so saving again
+    only encodes images the project does not have yet - reordered steps keep their files.
+    Files no step references any more are removed after a save.
+    New images are written with the given codec (IMAGE_CODECS)."""
+    def __init__(self, path, codec="png"):
+        self.path = os.path.abspath(path)
+        self.img_path = os.path.join(self.path, "images")
+        self.project_file = os.path.join(self.path, "project.json")
+        self.root = os.path.dirname(self.path) # Projects root, shared by the tile store
+        self.codec = IMAGE_CODECS.get(codec, IMAGE_CODECS["png"])
+
+    @staticmethod
+    def digest(ref):
+        """Content hash of an image, computed once per handle (images are immutable)"""
+        if ref.digest is None:
+            img = np.ascontiguousarray(ref.array())
+            h = hashlib.blake2b(str(img.shape).encode(), digest_size=12)
+            h.update(img.data)
+            ref.digest = h.hexdigest()
+        return ref.digest
+
+    def image_file(self, ref):
+        """File name of an image in this project, writes the file only if it is missing"""
+        if ref is None: return None
+        if ref.origin and os.path.dirname(ref.origin) == self.img_path and os.path.exists(ref.origin):
+            return os.path.basename(ref.origin)
+        digest = self.digest(ref)
+        # Same name = same content, e.g. a step that was deleted and restored (in any codec)
+        for ext in IMAGE_EXTENSIONS:
+            path = os.path.join(self.img_path, f"img_{digest}{ext}")
+            if os.path.exists(path):
+                ref.origin = path
+                return os.path.basename(path)
+        img = ref.array()
+        codec = self.codec.for_image(img)
+        filename = f"img_{digest}{codec.ext}"
+        path = os.path.join(self.img_path, filename)
+        data = codec.encode(img, self.root)
+        # Unique temp file: refs with equal content can be written by two pool threads at once
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.img_path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+        ref.origin = path
+        return filename
+
+    def read_image(self, filename):
+        """Image handle for a project file, decoded on first use"""
+        path = os.path.join(self.img_path, filename)
+        ref = StepImageStore.instance().put_file(path)
+        if ref is not None:
+            ref.origin = path
+            if filename.startswith("img_"): # Hash from the name, no need to rehash on save-as
+                ref.digest = image_name_digest(filename)
+        return ref
+
+    def load(self):
+        with open(self.project_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def exists(self):
+        return os.path.exists(self.project_file)
+
+    def has_image(self, filename):
+        return os.path.exists(os.path.join(self.img_path, filename))
+
+    @staticmethod
+    def cover_png(steps):
+        """Small PNG of the first step for the project list"""
+        if not steps or steps[0].image_ref is None: return None
+        small = StepImageStore.instance().thumbnail(steps[0].image_ref)
+        if small is None:
+            small = StepImageStore.make_thumbnail(steps[0].image_ref.array())
+        ok, buf = cv2.imencode(".png", small)
+        return buf.tobytes() if ok else None
+
+    def write_cover(self, steps):
+        path = os.path.join(self.path, "cover.png")
+        data = self.cover_png(steps)
+        if data is None:
+            if os.path.exists(path): os.remove(path)
+            return
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def make_summary(descriptions, steps, size, cover):
+        excerpt = next((d.strip().splitlines()[0] for d in descriptions if d and d.strip()), "")
+        return {"steps": steps, "bytes": size, "excerpt": excerpt[:80], "cover": cover}
+
+    def summary(self):
+        """Project list info from project.json and file sizes, step images are not read"""
+        data = self.load()
+        size = os.path.getsize(self.project_file)
+        if os.path.isdir(self.img_path):
+            with os.scandir(self.img_path) as it:
+                size += sum(e.stat().st_size for e in it if e.is_file())
+        steps = data.get("steps", [])
+        cover = os.path.join(self.path, "cover.png")
+        return self.make_summary([s.get("description", "") for s in steps], len(steps), size,
+                                 cover if os.path.exists(cover) else None)
+
+    def delete(self):
+        shutil.rmtree(self.path)
+
+    def write(self, data):
+        """Replace project.json atomically, an interrupted save keeps the previous version"""
+        tmp_path = self.project_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.project_file)
+
+    @staticmethod
+    def step_refs(steps):
+        refs = {}
+        for s in steps:
+            for ref in (s.image_ref, s.hover_ref):
+                if ref is not None:
+                    refs.setdefault(ref.key, ref)
+        return list(refs.values())
+
+    @staticmethod
+    def parallel(func, items):
+        """func over items on a thread pool (PNG coding and hashing release the GIL), yields results as they finish"""
+        if not items: return
+        with ThreadPoolExecutor(max_workers=min(len(items), os.cpu_count() or 2, 8)) as pool:
+            for future in as_completed([pool.submit(func, item) for item in items]):
+                yield future.result()
+
+    def write_images(self, refs, progress=None):
+        """Encode the images the project lacks in parallel"""
+        for done, _ in enumerate(self.parallel(self.image_file, refs), 1):
+            if progress: progress(done, len(refs))
+
+    def step_entries(self, steps):
+        entries = []
+        for s in steps:
+            entries.append(s.project_data(self.image_file(s.image_ref), self.image_file(s.hover_ref)))
+        return entries
+
+    def save(self, steps, global_layers, global_crop, progress=None):
+        """progress(done, total) is called from the saving thread"""
+        os.makedirs(self.img_path, exist_ok=True)
+        self.write_images(self.step_refs(steps), progress)
+        self.write_cover(steps) # Before project.json, whose mtime tells the catalog to re-read
+        data = {
+            "global_crop": global_crop,
+            "global_layers": [{"type": l.type, "data": l.data, "label": l.label, "uid": l.uid} for l in global_layers],
+            "steps": self.step_entries(steps)
+        }
+        self.write(data)
+        self.collect_garbage(data)
+
+    def append(self, steps):
+        """Add steps to the end of the saved project without reading its images"""
+        data = self.load()
+        os.makedirs(self.img_path, exist_ok=True)
+        self.write_images(self.step_refs(steps))
+        new_steps = self.step_entries(steps)
+        data.setdefault("steps", []).extend(new_steps)
+        self.write(data)
+        return len(new_steps)
+
+    def collect_garbage(self, data):
+        referenced = set()
+        for step_data in data.get("steps", []):
+            referenced.add(step_data.get("image"))
+            referenced.add(step_data.get("hover_image"))
+        for filename in os.listdir(self.img_path):
+            if filename not in referenced:
+                # Deleted steps may still be in the editor's undo history
+                StepImageStore.instance().release_file(os.path.join(self.img_path, filename))
+                try: os.remove(os.path.join(self.img_path, filename))
+                except OSError as e: print(f"Could not remove {filename}: {e}")
+
+ProjectBlob = namedtuple("ProjectBlob", "db hash") # Image source inside a ProjectContainer
+
+class ProjectContainer(ProjectStorage):
+    """Single-file project (SQLite): every image is stored once as a PNG blob under its
+    content hash, steps and project settings live in tables. One file copies and syncs
+    much faster than a folder of PNGs, and one step's image is read without touching
+    the others. Saves are a single transaction."""
+    EXTENSION = ".csgproj"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS steps (pos INTEGER PRIMARY KEY, image TEXT, hover_image TEXT, description TEXT, data TEXT);
+        CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB, ext TEXT NOT NULL DEFAULT '.png');
+    """
+
+    def __init__(self, path, codec="png"):
+        self.path = os.path.abspath(path)
+        self.project_file = self.path
+        self.root = os.path.dirname(self.path)
+        self.codec = IMAGE_CODECS.get(codec, IMAGE_CODECS["png"])
+        self.db = None
+        self.shapes = None # Cache of blob_shapes(), dropped by every write
+
+    def connect(self, write=False):
+        db = sqlite3.connect(self.path)
+        if write: # Creating the schema touches the file, readers must not change its mtime
+            self.shapes = None
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL") # Only takes effect in a new file
+            db.executescript(self.SCHEMA)
+            if "ext" not in [c[1] for c in db.execute("PRAGMA table_info(blobs)")]: # Containers from before codecs
+                db.execute("ALTER TABLE blobs ADD COLUMN ext TEXT NOT NULL DEFAULT '.png'")
+        return db
+
+    @staticmethod
+    def read_blob(blob, size=-1):
+        """Saved bytes of a ProjectBlob (size > 0: only the first bytes, read incrementally)"""
+        db = sqlite3.connect(blob.db)
+        try:
+            if size > 0:
+                row = db.execute("SELECT rowid FROM blobs WHERE hash = ?", (blob.hash,)).fetchone()
+                if row is not None:
+                    with db.blobopen("blobs", "data", row[0], readonly=True) as f:
+                        return f.read(size)
+            else:
+                row = db.execute("SELECT data FROM blobs WHERE hash = ?", (blob.hash,)).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            raise OSError(f"Image {blob.hash} missing in {blob.db}")
+        return row[0]
+
+    def blob_shapes(self):
+        """hash -> image shape of every blob, from the first bytes of each blob over one connection"""
+        if self.shapes is None:
+            shapes = {}
+            db = self.connect()
+            try:
+                for rowid, digest in db.execute("SELECT rowid, hash FROM blobs").fetchall():
+                    with db.blobopen("blobs", "data", rowid, readonly=True) as f:
+                        shapes[digest] = StepImageStore.header_shape(f.read(25))
+            finally:
+                db.close()
+            self.shapes = shapes
+        return self.shapes
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def has_image(self, filename):
+        return image_name_digest(filename) in self.blob_shapes()
+
+    def delete(self):
+        os.remove(self.path)
+
+    def summary(self):
+        db = self.connect()
+        try:
+            count = db.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+            descriptions = [d for (d,) in db.execute("SELECT description FROM steps ORDER BY pos LIMIT 20")]
+            row = db.execute("SELECT value FROM meta WHERE key = 'cover'").fetchone()
+        finally:
+            db.close()
+        return self.make_summary(descriptions, count, os.path.getsize(self.path), row[0] if row else None)
+
+    def image_file(self, ref):
+        if ref is None: return None
+        digest = self.digest(ref)
+        row = self.db.execute("SELECT ext FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            img = ref.array()
+            codec = self.codec.for_image(img)
+            self.db.execute("INSERT INTO blobs (hash, data, ext) VALUES (?, ?, ?)",
+                            (digest, codec.encode(img, self.root), codec.ext))
+            return f"img_{digest}{codec.ext}"
+        return f"img_{digest}{row[0]}"
+
+    def write_images(self, refs, progress=None):
+        """Hash and encode on the pool, insert here: the connection belongs to this thread"""
+        stored = {digest for (digest,) in self.db.execute("SELECT hash FROM blobs")}
+        def encode(ref):
+            digest = self.digest(ref)
+            if digest in stored: return digest, None, None
+            img = ref.array()
+            codec = self.codec.for_image(img)
+            return digest, codec.encode(img, self.root), codec.ext
+        for done, (digest, data, ext) in enumerate(self.parallel(encode, refs), 1):
+            if data is not None:
+                self.db.execute("INSERT OR IGNORE INTO blobs (hash, data, ext) VALUES (?, ?, ?)", (digest, data, ext))
+            if progress: progress(done, len(refs))
+
+    def read_image(self, filename):
+        digest = image_name_digest(filename)
+        shapes = self.blob_shapes()
+        if digest not in shapes:
+            print(f"Image missing in project: {filename}")
+            return None
+        ref = StepImageStore.instance().put_file(ProjectBlob(self.path, digest), shapes[digest])
+        if ref is not None:
+            ref.digest = digest
+        return ref
+
+    def load(self):
+        db = self.connect()
+        try:
+            meta = dict(db.execute("SELECT key, value FROM meta"))
+            data = {
+                "global_crop": json.loads(meta.get("global_crop", "null")),
+                "global_layers": json.loads(meta.get("global_layers", "[]")),
+                "steps": []
+            }
+            for image, hover_image, description, step_json in db.execute(
+                    "SELECT image, hover_image, description, data FROM steps ORDER BY pos"):
+                step_data = json.loads(step_json)
+                step_data.update({"image": image, "description": description})
+                if hover_image:
+                    step_data["hover_image"] = hover_image
+                data["steps"].append(step_data)
+        finally:
+            db.close()
+        return data
+
+    @staticmethod
+    def insert_step(db, pos, step_data):
+        rest = {k: v for k, v in step_data.items() if k not in ("image", "hover_image", "description")}
+        db.execute("INSERT INTO steps VALUES (?, ?, ?, ?, ?)",
+                   (pos, step_data["image"], step_data.get("hover_image"), step_data.get("description", ""), json.dumps(rest)))
+
+    @staticmethod
+    def write_meta(db, data):
+        db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+            ("format", "1"),
+            ("global_crop", json.dumps(data.get("global_crop"))),
+            ("global_layers", json.dumps(data.get("global_layers", [])))
+        ])
+
+    def save(self, steps, global_layers, global_crop, progress=None):
+        self.db = self.connect(write=True)
+        try:
+            with self.db: # One transaction, an interrupted save keeps the previous version
+                self.write_images(self.step_refs(steps), progress)
+                data = {
+                    "global_crop": global_crop,
+                    "global_layers": [{"type": l.type, "data": l.data, "label": l.label, "uid": l.uid} for l in global_layers],
+                    "steps": self.step_entries(steps)
+                }
+                self.db.execute("DELETE FROM steps")
+                for pos, step_data in enumerate(data["steps"]):
+                    self.insert_step(self.db, pos, step_data)
+                self.write_meta(self.db, data)
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('cover', ?)", (self.cover_png(steps),))
+                self.collect_garbage(data)
+            self.db.execute("PRAGMA incremental_vacuum").fetchall()
+        finally:
+            self.db.close()
+            self.db = None
+
+    def append(self, steps):
+        self.db = self.connect(write=True)
+        try:
+            with self.db:
+                pos = self.db.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM steps").fetchone()[0]
+                self.write_images(self.step_refs(steps))
+                new_steps = self.step_entries(steps)
+                for i, step_data in enumerate(new_steps):
+                    self.insert_step(self.db, pos + i, step_data)
+        finally:
+            self.db.close()
+            self.db = None
+        return len(new_steps)
+
+    def collect_garbage(self, data):
+        referenced = set()
+        for step_data in data.get("steps", []):
+            for name in (step_data.get("image"), step_data.get("hover_image")):
+                if name: referenced.add(image_name_digest(name))
+        store = StepImageStore.instance()
+        for (digest,) in self.db.execute("SELECT hash FROM blobs").fetchall():
+            if digest not in referenced:
+                # Read through this connection, the transaction holds the write lock
+                store.release_file(ProjectBlob(self.path, digest), lambda: self.db.execute(
+                    "SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()[0])
+                self.db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+
+    @staticmethod
+    def portable(ext, blob, src_root, dst_root):
+        """Tile maps only work next to their tile store: outside that root they become PNGs"""
+        if ext != TileStore.EXT or os.path.abspath(src_root) == os.path.abspath(dst_root):
+            return ext, blob
+        return ".png", IMAGE_CODECS["png"].encode(TileStore.for_root(src_root).decode(blob))
+
+    @classmethod
+    def import_folder(cls, folder, path):
+        """Convert a project folder into a container, streaming one image file at a time.
+        Files without a content-hash name are keyed by the hash of their PNG bytes."""
+        src = ProjectStorage(folder)
+        data = src.load()
+        dst = cls(path)
+        db = dst.connect(write=True)
+        names = {} # file in the folder -> blob name
+        try:
+            with db:
+                pos = 0
+                for step_data in data.get("steps", []):
+                    entry = dict(step_data)
+                    try:
+                        for field in ("image", "hover_image"):
+                            filename = entry.get(field)
+                            if not filename: continue
+                            if filename not in names:
+                                with open(os.path.join(src.img_path, filename), "rb") as f:
+                                    blob = f.read()
+                                digest = image_name_digest(filename) or hashlib.blake2b(blob, digest_size=12).hexdigest()
+                                ext = os.path.splitext(filename)[1].lower() or ".png"
+                                ext, blob = cls.portable(ext, blob, src.root, dst.root)
+                                db.execute("INSERT OR IGNORE INTO blobs (hash, data, ext) VALUES (?, ?, ?)", (digest, blob, ext))
+                                names[filename] = f"img_{digest}{ext}"
+                            entry[field] = names[filename]
+                    except OSError as e:
+                        print(f"Import: step skipped, {e}") # Same as opening the folder project
+                        continue
+                    cls.insert_step(db, pos, entry)
+                    pos += 1
+                cls.write_meta(db, data)
+        finally:
+            db.close()
+        return dst
+
+    def export_folder(self, folder):
+        """Write the container as a project folder, one image at a time"""
+        data = self.load()
+        dst = ProjectStorage(folder)
+        os.makedirs(dst.img_path, exist_ok=True)
+        db = self.connect()
+        try:
+            names = {n for s in data["steps"] for n in (s.get("image"), s.get("hover_image")) if n}
+            renamed = {}
+            for name in names:
+                row = db.execute("SELECT data FROM blobs WHERE hash = ?", (image_name_digest(name),)).fetchone()
+                if row is None: continue
+                ext, blob = self.portable(os.path.splitext(name)[1], row[0], self.root, dst.root)
+                renamed[name] = f"img_{image_name_digest(name)}{ext}"
+                with open(os.path.join(dst.img_path, renamed[name]), "wb") as f:
+                    f.write(blob)
+        finally:
+            db.close()
+        for step_data in data["steps"]:
+            for field in ("image", "hover_image"):
+                if step_data.get(field) in renamed:
+                    step_data[field] = renamed[step_data[field]]
+        dst.write(data)
+        return dst
+
+class BackgroundSaver(QObject):
+    """Saves projects off the GUI thread. The editor hands over a snapshot of its model;
+    saves requested while one runs are queued in order. A queued save of the same project
+    is replaced, so each project gets at most one more save after the running one - with
+    the newest state and only the images still missing. Other projects (save as) are kept."""
+    progress = pyqtSignal(int, int)  # Images done, total
+    finished = pyqtSignal(str, str)  # Project name, error message ("" on success)
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.pending = OrderedDict() # name -> (storage, snapshot)
+        self.thread = None
+
+    def submit(self, name, storage, snapshot):
+        with self.lock:
+            self.pending[name] = (storage, snapshot)
+            if self.thread: return # Picked up when the running save is done
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def is_busy(self):
+        with self.lock:
+            return self.thread is not None
+
+    def wait(self):
+        thread = self.thread
+        if thread: thread.join()
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+                name, (storage, snapshot) = self.pending.popitem(last=False)
+            error = ""
+            try:
+                storage.save(snapshot["steps"], snapshot["global_layers"], snapshot["global_crop"],
+                             lambda done, total: self.progress.emit(done, total))
+            except Exception as e:
+                print(f"Save failed: {e}")
+                error = str(e)
+            with self.lock:
+                superseded = name in self.pending
+            if error or not superseded: # Otherwise the queued save of this project reports
+                self.finished.emit(name, error)
+
+class ProjectCatalog:
+    """Index of the saved projects for the recorder's project list: step count, size, date,
+    description excerpt and cover. An entry is only re-read when its project.json or
+    .csgproj changed (mtime), and never reads step images, so the list stays instant
+    with many projects. Kept in catalog.json next to the projects folder."""
+    def __init__(self, root):
+        self.root = root
+        base = os.path.dirname(root)
+        self.path = os.path.join(base, "catalog.json")
+        self.cover_dir = os.path.join(base, "catalog_covers")
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("projects", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def scan(self):
+        """name -> (main file, mtime) of every project, one directory listing plus a stat each"""
+        found = {}
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.endswith(ProjectContainer.EXTENSION) and entry.is_file():
+                    found[entry.name[:-len(ProjectContainer.EXTENSION)]] = (entry.path, entry.stat().st_mtime)
+                elif entry.is_dir():
+                    name = entry.name
+                    if name in found and found[name][0].endswith(ProjectContainer.EXTENSION):
+                        continue # Same name as a container, which is the one that opens
+                    main = os.path.join(entry.path, "project.json")
+                    try:
+                        found.setdefault(name, (main, os.stat(main).st_mtime))
+                    except OSError:
+                        found.setdefault(name, (main, None)) # Not saved (yet)
+        return found
+
+    def refresh(self):
+        """Update the changed entries, returns True if anything changed"""
+        found = self.scan()
+        changed = set(found) != set(self.entries)
+        entries = {}
+        for name, (main, mtime) in found.items():
+            old = self.entries.get(name)
+            if old and old.get("mtime") == mtime and old.get("file") == main:
+                entries[name] = old
+                continue
+            entries[name] = self.read_entry(name, main, mtime)
+            changed = True
+        self.entries = entries
+        if changed:
+            self.save()
+        return changed
+
+    def read_entry(self, name, main, mtime):
+        entry = {"file": main, "mtime": mtime, "steps": 0, "bytes": 0, "excerpt": "", "cover": None}
+        if mtime is None: return entry
+        try:
+            if main.endswith(ProjectContainer.EXTENSION):
+                entry.update(ProjectContainer(main).summary())
+            else:
+                entry.update(ProjectStorage(os.path.dirname(main)).summary())
+            if isinstance(entry["cover"], bytes): # Container: cached as a file for the list icon
+                os.makedirs(self.cover_dir, exist_ok=True)
+                cover = os.path.join(self.cover_dir, f"{name}.png")
+                with open(cover, "wb") as f:
+                    f.write(entry["cover"])
+                entry["cover"] = cover
+        except Exception as e:
+            print(f"Catalog: could not read {name}: {e}")
+            entry["cover"] = None
+        return entry
+
+    def save(self):
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "projects": self.entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Catalog save failed: {e}")
+
+def open_project_storage(root, name, default_format="folder", codec="png"):
+    """Storage of a project by name; existing projects keep their format, codec applies to new images"""
+    container = os.path.join(root, name + ProjectContainer.EXTENSION)
+    folder = os.path.join(root, name)
+    if os.path.exists(container):
+        return ProjectContainer(container, codec)
+    if os.path.isdir(folder) or default_format != "container":
+        return ProjectStorage(folder, codec)
+    return ProjectContainer(container, codec)
+
 # ==================== RECORDER (unchanged) ====================
 
 class Step:
     def __init__(self, raw_img, x, y, label):
+        self.image_ref = None # StepImage handles, the pixels live in the StepImageStore
+        self.hover_ref = None
         self.raw_img = raw_img
+        self.meta = {} # Capture diagnostics (settle time etc.), saved with the project
         self.x, self.y = x, y
         self.description = label
         self.layers = [Layer('click', {'x': x, 'y': y}, label)]
 
-class RecordingSignal(QObject):
-    click_detected = pyqtSignal(int, int, str, object)
+    @property
+    def raw_img(self):
+        return self.image_ref.array() if self.image_ref else None
 
-class RecordingThread(QThread):
+    @raw_img.setter
+    def raw_img(self, img):
+        # Accepts an array or a StepImage handle
+        self.image_ref = StepImageStore.instance().put(img)
+
+    @property
+    def hover_img(self):
+        """Optional frame from just before the click (ring capture mode)"""
+        return self.hover_ref.array() if self.hover_ref else None
+
+    @hover_img.setter
+    def hover_img(self, img):
+        self.hover_ref = StepImageStore.instance().put(img)
+
+    def project_data(self, image, hover_image=None):
+        """Entry in project.json, images are referenced by file name"""
+        data = {
+            "image": image,
+            "description": self.description,
+            "layers": [{"type": l.type, "data": l.data, "label": l.label} for l in self.layers]
+        }
+        if self.meta:
+            data["meta"] = self.meta
+        if hover_image:
+            data["hover_image"] = hover_image
+        return data
+
+class FrameRingBuffer:
+    """Thread-safe bounded buffer of recent (timestamp, frame) pairs.
+    Frames are kept as raw PIL grabs; conversion happens only for frames that get picked."""
+    def __init__(self, capacity):
+        self.frames = deque(maxlen=max(2, int(capacity)))
+        self.cond = threading.Condition()
+
+    def push(self, ts, frame):
+        with self.cond:
+            self.frames.append((ts, frame))
+            self.cond.notify_all()
+
+    def clear(self):
+        with self.cond:
+            self.frames.clear()
+
+    def wait_for(self, ts, timeout):
+        """Block until a frame taken at or after ts exists (or timeout expires)"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while not self.frames or self.frames[-1][0] < ts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+            return True
+
+    def nearest(self, ts):
+        """Frame whose timestamp is closest to ts"""
+        with self.cond:
+            if not self.frames: return None
+            return min(self.frames, key=lambda f: abs(f[0] - ts))
+
+    def before(self, ts):
+        """Newest frame taken strictly before ts (hover state)"""
+        with self.cond:
+            for f in reversed(self.frames):
+                if f[0] < ts:
+                    return f
+        return None
+
+    def after(self, ts):
+        """Oldest frame taken at or after ts (the screen's reaction to an input)"""
+        with self.cond:
+            for f in self.frames:
+                if f[0] >= ts:
+                    return f
+        return None
+
+class VideoTimeline:
+    """Low-rate video of the recorded area plus the capture time of every frame.
+    A grab thread encodes it while recording (steady cost instead of a full grab per
+    click); steps take their image from the same frames while they are still in memory,
+    and the editor can re-pick a step's frame from the video later. The frame times are
+    stored next to the video as <video>.json."""
+    KEEP = 10 # Newest timelines kept on disk, older projects lose the re-pick option
+
+    def __init__(self, path, size, fps):
+        self.path = path
+        self.size = size
+        self.fps = fps
+        self.times = []
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+        if not self.writer.isOpened():
+            raise RuntimeError(f"Video {path} can't be written")
+
+    @staticmethod
+    def root():
+        return os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "timelines")
+
+    @classmethod
+    def create(cls, size, fps):
+        root = cls.root()
+        os.makedirs(root, exist_ok=True)
+        videos = sorted(f for f in os.listdir(root) if f.endswith(".mp4"))
+        for f in videos[:max(0, len(videos) - cls.KEEP + 1)]:
+            for old in (f, f + ".json"):
+                try: os.remove(os.path.join(root, old))
+                except OSError: pass
+        return cls(os.path.join(root, f"timeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"), size, fps)
+
+    def write(self, t, frame):
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size) # Resolution changed mid-session
+        self.writer.write(frame)
+        self.times.append(t)
+
+    def close(self):
+        self.writer.release()
+        t0 = self.times[0] if self.times else 0
+        with open(self.path + ".json", "w") as f:
+            json.dump({"fps": self.fps, "times": [round(t - t0, 3) for t in self.times]}, f)
+
+    def index_at(self, t, before=False):
+        if not self.times: return None
+        if before:
+            return max(0, bisect.bisect_right(self.times, t) - 1)
+        return min(len(self.times) - 1, bisect.bisect_left(self.times, t))
+
+    @staticmethod
+    def read_frames(path, indices):
+        """Decode the given frame indices in one sequential pass"""
+        wanted = set(indices)
+        frames = {}
+        cap = cv2.VideoCapture(path)
+        for i in range(max(wanted) + 1 if wanted else 0):
+            if i in wanted:
+                ok, frame = cap.read()
+                if ok: frames[i] = frame
+            else:
+                ok = cap.grab() # Skip without decoding to BGR
+            if not ok: break
+        cap.release()
+        return frames
+
+    @staticmethod
+    def load_times(path):
+        try:
+            with open(path + ".json", "r") as f:
+                return json.load(f).get("times", [])
+        except (OSError, ValueError):
+            return []
+
+class SettleDetector:
+    """Waits until the screen stops changing after a click.
+    Consecutive grabs are compared on a strided (downscaled) view with a vectorized
+    NumPy diff, averaged per tile of tile x tile samples: a small spinner or fading
+    button must not disappear in the mean over the whole screen. The last grab is
+    returned as soon as no tile differs by more than the threshold, or when max_wait
+    is reached (e.g. endless animations)."""
+    def __init__(self, max_wait=0.6, min_wait=0.04, threshold=1.0, stride=8, tile=8):
+        self.max_wait = max_wait
+        self.min_wait = min_wait
+        self.threshold = threshold
+        self.stride = stride
+        self.tile = tile
+
+    def max_tile_diff(self, prev, cur):
+        """Largest mean abs. difference of any tile"""
+        diff = np.abs(cur - prev)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        rows = np.arange(0, diff.shape[0], self.tile)
+        cols = np.arange(0, diff.shape[1], self.tile)
+        sums = np.add.reduceat(np.add.reduceat(diff, rows, axis=0, dtype=np.int64), cols, axis=1)
+        counts = np.outer(np.diff(np.append(rows, diff.shape[0])), np.diff(np.append(cols, diff.shape[1])))
+        return float((sums / counts).max())
+
+    def capture(self, grab, small, t_click):
+        """grab() returns a frame, small(frame, stride) a downscaled array of it.
+        Returns (frame, settle_seconds, settled)"""
+        delay = t_click + self.min_wait - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        
+        raw = grab()
+        prev = small(raw, self.stride).astype(np.int16)
+        while True:
+            raw = grab()
+            cur = small(raw, self.stride).astype(np.int16)
+            elapsed = time.monotonic() - t_click
+            if cur.shape == prev.shape and cur.size and self.max_tile_diff(prev, cur) < self.threshold:
+                return raw, elapsed, True
+            if elapsed >= self.max_wait:
+                return raw, elapsed, False
+            prev = cur
+
+class ScrollStitcher:
+    """Stitches frames taken while scrolling into one tall image.
+    Each frame is reduced to a row signature (every row downscaled to a few columns).
+    Rows that don't move between two frames (sticky headers/footers) are cut off first;
+    the scroll shift is the offset with the smallest squared signature difference over
+    the moving band, computed for all offsets at once via FFT cross-correlation.
+    Only the rows new in a frame are kept, overlapping rows are stored once. They are
+    cut at one fixed boundary, the top of the sticky footer as found by the first pair."""
+    SIG_COLUMNS = 32
+
+    def __init__(self, min_overlap=40, max_error=6.0, max_height=20000):
+        self.min_overlap = min_overlap
+        self.max_error = max_error # Max. RMS signature difference of a match
+        self.max_height = max_height
+        self.first = None
+        self.last = None
+        self.prev_sig = None
+        self.strips = []
+        self.head_bottom = 0
+        self.footer_top = 0
+        self.height = 0
+        self.frames = 0
+
+    def signature(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (self.SIG_COLUMNS, gray.shape[0]), interpolation=cv2.INTER_AREA).astype(np.float64)
+
+    def find_shift(self, prev, cur):
+        """(shift, top, bottom) of the scrolled band, shift None if the frames don't line up"""
+        moving = np.nonzero(np.abs(prev - cur).mean(axis=1) > 1.0)[0]
+        if len(moving) == 0:
+            return None, 0, 0
+        top, bottom = int(moving[0]), int(moving[-1]) + 1
+        a, b = prev[top:bottom], cur[top:bottom]
+        n = bottom - top
+        if n <= self.min_overlap + 1:
+            return None, top, bottom
+        
+        # cross[d] = sum_i a[i + d] . b[i], zero padded so the correlation is linear
+        size = 1 << (2 * n - 1).bit_length()
+        cross = np.fft.irfft(np.fft.rfft(a, size, axis=0) * np.conj(np.fft.rfft(b, size, axis=0)), size, axis=0).sum(axis=1)[:n]
+        a2 = (a * a).sum(axis=1)
+        b2 = (b * b).sum(axis=1)
+        tail_a = np.cumsum(a2[::-1])[::-1] # sum of a[d:]^2
+        head_b = np.cumsum(b2)             # sum of b[:k]^2
+        
+        shifts = np.arange(1, n - self.min_overlap)
+        overlap = n - shifts
+        ssd = tail_a[shifts] + head_b[overlap - 1] - 2 * cross[shifts]
+        rms = np.sqrt(np.maximum(ssd, 0) / (overlap * self.SIG_COLUMNS))
+        best = int(np.argmin(rms))
+        if rms[best] > self.max_error:
+            return None, top, bottom
+        return int(shifts[best]), top, bottom
+
+    def add(self, frame):
+        """Add a frame, returns True if it extended the image"""
+        sig = self.signature(frame)
+        if self.first is None:
+            self.first = self.last = frame
+            self.prev_sig = sig
+            self.height = frame.shape[0]
+            self.frames = 1
+            return True
+        if sig.shape != self.prev_sig.shape:
+            return False
+        
+        # Scrolling back up or a different page doesn't match and is ignored
+        shift, top, bottom = self.find_shift(self.prev_sig, sig)
+        if not shift or self.height + shift > self.max_height:
+            return False
+        if not self.strips:
+            # Header and band of the first frame. The footer stays where it is: a later pair's band
+            # ends higher when its last rows happen to match, cutting there would repeat or drop rows
+            self.head_bottom = self.footer_top = bottom
+        if shift > self.footer_top:
+            return False
+        self.strips.append(frame[self.footer_top - shift:self.footer_top].copy())
+        self.last, self.prev_sig = frame, sig
+        self.height += shift
+        self.frames += 1
+        return True
+
+    def result(self):
+        if not self.strips:
+            return self.first
+        return np.vstack([self.first[:self.head_bottom]] + self.strips + [self.last[self.footer_top:]])
+
+def get_monitor_rects():
+    """Monitor rectangles (left, top, right, bottom) in physical desktop pixels,
+    the same coordinate space pynput reports clicks in"""
+    if os.name == 'nt':
+        try:
+            from ctypes import wintypes
+            rects = []
+            MonitorEnumProc = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                                 ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+            def on_monitor(hmon, hdc, lprect, lparam):
+                r = lprect.contents
+                rects.append((r.left, r.top, r.right, r.bottom))
+                return 1
+            callback = MonitorEnumProc(on_monitor) # Keep a reference while enumerating
+            ctypes.windll.user32.EnumDisplayMonitors(None, None, callback, 0)
+            if rects:
+                return rects
+        except Exception as e:
+            print(f"Monitor enumeration failed: {e}")
+    
+    rects = []
+    for screen in QApplication.screens():
+        g = screen.geometry()
+        dpr = screen.devicePixelRatio()
+        rects.append((int(g.x() * dpr), int(g.y() * dpr),
+                      int((g.x() + g.width()) * dpr), int((g.y() + g.height()) * dpr)))
+    return rects
+
+def get_capture_zones(windows=()):
+    """Named screen areas for capture rules, physical pixels like get_monitor_rects():
+    'taskbar' = taskbars/docks/panels (incl. the system tray), 'app' = the given own windows while shown.
+    On Windows 'app_windows' keeps the window handles so 'app' is re-checked at click time"""
+    zones = {"taskbar": [], "app": []}
+    if os.name == 'nt':
+        try:
+            from ctypes import wintypes
+            user32 = ctypes.windll.user32
+            for cls in ("Shell_TrayWnd", "Shell_SecondaryTrayWnd"):
+                hwnd = user32.FindWindowExW(None, None, cls, None)
+                while hwnd:
+                    r = wintypes.RECT()
+                    if user32.GetWindowRect(hwnd, ctypes.byref(r)):
+                        zones["taskbar"].append((r.left, r.top, r.right, r.bottom))
+                    hwnd = user32.FindWindowExW(None, hwnd, cls, None)
+            zones["app_windows"] = [int(w.winId()) for w in windows]
+            zones["app"] = visible_window_rects(zones["app_windows"])
+        except Exception as e:
+            print(f"Zone lookup failed: {e}")
+    
+    if not zones["taskbar"]:
+        # Whatever the window manager reserves outside the available screen area
+        for screen in QApplication.screens():
+            g, a = screen.geometry(), screen.availableGeometry()
+            dpr = screen.devicePixelRatio()
+            gl, gt, gr, gb = g.x(), g.y(), g.x() + g.width(), g.y() + g.height()
+            al, at, ar, ab = a.x(), a.y(), a.x() + a.width(), a.y() + a.height()
+            for l, t, r, b in ((gl, gt, gr, at), (gl, ab, gr, gb), (gl, gt, al, gb), (ar, gt, gr, gb)):
+                if r > l and b > t:
+                    zones["taskbar"].append((int(l * dpr), int(t * dpr), int(r * dpr), int(b * dpr)))
+    if not zones["app"] and "app_windows" not in zones:
+        for w in windows:
+            if not w.isVisible() or w.isMinimized():
+                continue
+            g = w.frameGeometry()
+            dpr = w.devicePixelRatio()
+            zones["app"].append((int(g.x() * dpr), int(g.y() * dpr),
+                                 int((g.x() + g.width()) * dpr), int((g.y() + g.height()) * dpr)))
+    return zones
+
+def visible_window_rects(hwnds):
+    """Screen rectangles of the given native windows that are currently shown (Windows only)"""
+    rects = []
+    try:
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        for hwnd in hwnds:
+            r = wintypes.RECT()
+            if user32.IsWindowVisible(hwnd) and not user32.IsIconic(hwnd) and user32.GetWindowRect(hwnd, ctypes.byref(r)):
+                rects.append((r.left, r.top, r.right, r.bottom))
+    except Exception as e:
+        print(f"Window lookup failed: {e}")
+    return rects
+
+def get_monitor_scales(rects):
+    """Display scale factor (devicePixelRatio) of each rectangle from get_monitor_rects()"""
+    scales = []
+    for l, t, r, b in rects:
+        cx, cy = (l + r) // 2, (t + b) // 2
+        scale = None
+        if os.name == 'nt':
+            try:
+                from ctypes import wintypes
+                hmon = ctypes.windll.user32.MonitorFromPoint(wintypes.POINT(cx, cy), 2) # MONITOR_DEFAULTTONEAREST
+                dpi_x, dpi_y = ctypes.c_uint(), ctypes.c_uint()
+                if ctypes.windll.shcore.GetDpiForMonitor(hmon, 0, ctypes.byref(dpi_x), ctypes.byref(dpi_y)) == 0:
+                    scale = dpi_x.value / 96.0
+            except Exception as e:
+                print(f"Monitor DPI lookup failed: {e}")
+        if scale is None:
+            for screen in QApplication.screens():
+                g = screen.geometry()
+                dpr = screen.devicePixelRatio()
+                if g.x() * dpr <= cx < (g.x() + g.width()) * dpr and g.y() * dpr <= cy < (g.y() + g.height()) * dpr:
+                    scale = dpr
+                    break
+        scales.append(scale or 1.0)
+    return scales
+
+def downscale_image(img, factor):
+    """Resolution policy downscale (INTER_AREA keeps small text readable), factor >= 1 is a no-op"""
+    if img is None or factor >= 1.0:
+        return img
+    h, w = img.shape[:2]
+    return cv2.resize(img, (max(1, round(w * factor)), max(1, round(h * factor))), interpolation=cv2.INTER_AREA)
+
+class RegionSelector(QDialog):
+    """Fullscreen rubber-band selector for the capture region of a session"""
     def __init__(self):
         super().__init__()
-        self.signals = RecordingSignal()
+        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.setCursor(Qt.CursorShape.CrossCursor)
+        
+        # Cover the whole virtual desktop
+        desktop = QRect()
+        for screen in QApplication.screens():
+            desktop = desktop.united(screen.geometry())
+        self.setGeometry(desktop)
+        
+        self.origin = None
+        self.current = None
+        self.region = None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 100))
+        if self.origin and self.current:
+            r = QRect(self.origin, self.current).normalized()
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            painter.fillRect(r, Qt.GlobalColor.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+            painter.setPen(QPen(QColor(0, 168, 255), 2, Qt.PenStyle.DashLine))
+            painter.drawRect(r)
+        else:
+            painter.setPen(QColor(255, 255, 255))
+            painter.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Aufnahmebereich aufziehen (ESC = Abbrechen)")
+
+    def mousePressEvent(self, event):
+        self.origin = event.position().toPoint()
+        self.current = self.origin
+        self.update()
+
+    def mouseMoveEvent(self, event):
+        if self.origin:
+            self.current = event.position().toPoint()
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        if not self.origin: return
+        r = QRect(self.origin, event.position().toPoint()).normalized()
+        if r.width() < 20 or r.height() < 20:
+            self.origin = self.current = None
+            self.update()
+            return
+        
+        # Logical Qt coordinates -> physical desktop pixels
+        top_left = self.mapToGlobal(r.topLeft())
+        screen = QApplication.screenAt(top_left) or QApplication.primaryScreen()
+        dpr = screen.devicePixelRatio()
+        self.region = (int(top_left.x() * dpr), int(top_left.y() * dpr),
+                       int((top_left.x() + r.width()) * dpr), int((top_left.y() + r.height()) * dpr))
+        self.accept()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.reject()
+
+class DuplicateFilter:
+    """Perceptual difference hash (dHash) over a tiny grayscale thumbnail.
+    Frames whose hash differs from the previous capture by at most max_distance bits
+    are compared pixel by pixel; only an identical frame counts as an unchanged screen
+    and reuses the previous BGR buffer. The hash keeps that full comparison off frames
+    that obviously differ, the comparison keeps small real changes (a checkbox, one
+    digit) that a 16x16 hash can't see."""
+    def __init__(self, max_distance=2, hash_size=16):
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.last_hash = None
+        self.last_img = None
+
+    def dhash(self, img):
+        small = cv2.resize(img, (self.hash_size + 1, self.hash_size), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        bits = gray[:, 1:] > gray[:, :-1]
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    def check(self, img):
+        """Returns (hash, previous image if img shows the same screen else None)"""
+        h = self.dhash(img)
+        prev = self.last_img
+        if (prev is not None and prev.shape == img.shape and bin(h ^ self.last_hash).count("1") <= self.max_distance
+                and cv2.norm(prev, img, cv2.NORM_INF) == 0):
+            return h, prev
+        self.last_hash, self.last_img = h, img
+        return h, None
+
+    def reset(self):
+        self.last_hash = self.last_img = None
+
+def find_changed_regions(prev, cur, block=16, threshold=24, max_regions=8):
+    """Bounding boxes [l, t, r, b] of the areas that differ between two screenshots, largest first.
+    The pixel difference is pooled per block x block tile in one vectorized pass;
+    tiles that touch (or are one tile apart) are joined into one region."""
+    h, w = cur.shape[:2]
+    if prev is None or prev.shape != cur.shape:
+        return [[0, 0, w, h]]
+    diff = cv2.absdiff(prev, cur)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    
+    th, tw = -(-h // block), -(-w // block)
+    padded = np.zeros((th * block, tw * block), np.uint8)
+    padded[:h, :w] = diff
+    tiles = padded.reshape(th, block, tw, block).max(axis=(1, 3)) > threshold
+    if not tiles.any():
+        return []
+    
+    joined = cv2.dilate(tiles.astype(np.uint8), np.ones((3, 3), np.uint8))
+    count, labels = cv2.connectedComponents(joined, connectivity=8)
+    regions = []
+    for i in range(1, count):
+        ys, xs = np.nonzero(tiles & (labels == i)) # Box of the changed tiles, without the dilation
+        regions.append([int(xs.min()) * block, int(ys.min()) * block,
+                        min(w, (int(xs.max()) + 1) * block), min(h, (int(ys.max()) + 1) * block)])
+    regions.sort(key=lambda r: (r[2] - r[0]) * (r[3] - r[1]), reverse=True)
+    return regions[:max_regions]
+
+class ChangeDetector(QObject):
+    """Background stage after capture: diffs each step against its predecessor and
+    stores the changed regions as step.meta['changes'] ([[l, t, r, b], ...]).
+    Steps without any change get meta['unchanged'] - right away if both share one image.
+    Only the diff runs in the worker thread; the result is handed to the GUI thread via
+    a queued signal and written there, like every other change to step.meta. A result may
+    arrive while a background save runs: that save works on the deep copy taken by
+    capture_snapshot() and keeps the state from before, the next save includes it."""
+    detected = pyqtSignal(object, object, object) # Step, image handle that was diffed, regions
+
+    def __init__(self):
+        super().__init__()
+        self.detected.connect(self.apply)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.worker_loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, step, prev_step):
+        if prev_step is None or step.image_ref is None:
+            return
+        step.meta.pop('changes', None)
+        step.meta.pop('unchanged', None)
+        if step.image_ref is prev_step.image_ref:
+            step.meta['changes'] = []
+            step.meta['unchanged'] = True
+            return
+        # The handles keep both images alive until the diff is done
+        self.queue.put((step, step.image_ref, prev_step.image_ref))
+
+    def worker_loop(self):
+        while True:
+            step, ref, prev_ref = self.queue.get()
+            try:
+                if step.image_ref is not ref:
+                    continue # Image was replaced meanwhile, a new job is queued
+                self.detected.emit(step, ref, find_changed_regions(prev_ref.array(), ref.array()))
+            except Exception as e:
+                print(f"Change detection failed: {e}")
+
+    def apply(self, step, ref, regions):
+        if step.image_ref is not ref:
+            return # Image was replaced meanwhile, a new job is queued
+        step.meta['changes'] = regions
+        if not regions:
+            step.meta['unchanged'] = True
+
+class GestureCoalescer:
+    """Turns raw press/release events into gestures before anything is captured.
+    - press + release further apart than drag_px: one 'drag' step (start and end point)
+    - a click within window seconds and radius px of the previous click (same button):
+      merged into it as a double-click / burst instead of a new capture
+    Gestures are returned as (action, gesture) with action 'new' or 'merge'."""
+    def __init__(self, window=0.35, radius=6, drag_px=12):
+        self.window = window
+        self.radius = radius
+        self.drag_px = drag_px
+        self.pressed = None
+        self.last_click = None
+
+    def feed(self, kind, x, y, t, button):
+        if kind == "press":
+            self.pressed = (x, y, t, button)
+            return []
+        if not self.pressed:
+            return []
+        
+        px, py, pt, pb = self.pressed
+        self.pressed = None
+        if math.hypot(x - px, y - py) > self.drag_px:
+            self.last_click = None
+            return [("new", {'kind': 'drag', 'x': px, 'y': py, 'end': (x, y), 't': t, 'button': pb, 'count': 1})]
+        
+        last = self.last_click
+        if (last and self.window > 0 and pb == last['button'] and pt - last['t_last'] <= self.window
+                and math.hypot(px - last['x'], py - last['y']) <= self.radius):
+            last['count'] += 1
+            last['t_last'] = pt
+            return [("merge", last)]
+        
+        self.last_click = {'kind': 'click', 'x': px, 'y': py, 't': pt, 't_last': pt, 'button': pb, 'count': 1}
+        return [("new", self.last_click)]
+
+class CaptureFilter:
+    """Decides per mouse press, inside the input hook and before anything is grabbed,
+    whether a click is recorded. Rules come from AppSettings.capture_rules; the first
+    matching rule wins and all conditions given in a rule must match:
+      region:      [left, top, right, bottom] in physical pixels or a zone name
+                   ("taskbar", "app" - see get_capture_zones)
+      button:      "left", "right" or "middle"
+      modifiers:   e.g. ["ctrl"], all of them held down
+      cooldown_ms: the previous recorded click was less than this ago
+      action:      "skip" (default) or "capture" (exception to the rules below it)
+    The release belonging to a skipped press is skipped as well."""
+    MODIFIERS = ("ctrl", "shift", "alt", "cmd")
+
+    def __init__(self, rules, zones=None):
+        self.rules = [r for r in rules if r.get("enabled", True)]
+        self.zones = zones or {}
+        self.held = set()
+        self.last_capture = None
+        self.skipped_buttons = set()
+        self.skipped = {} # Rule name -> skipped clicks
+
+    def uses_modifiers(self):
+        return any(r.get("modifiers") for r in self.rules)
+
+    def modifier(self, key):
+        name = getattr(key, "name", None) or ""
+        base = name.split("_")[0] # ctrl_l -> ctrl, alt_gr -> alt
+        return base if base in self.MODIFIERS else None
+
+    def key_down(self, key):
+        mod = self.modifier(key)
+        if mod: self.held.add(mod)
+
+    def key_up(self, key):
+        mod = self.modifier(key)
+        if mod: self.held.discard(mod)
+
+    def in_region(self, spec, x, y):
+        if spec == "app" and self.zones.get("app_windows"):
+            # A minimized window keeps its rectangle, only a shown one may swallow clicks
+            rects = visible_window_rects(self.zones["app_windows"])
+        else:
+            rects = self.zones.get(spec, []) if isinstance(spec, str) else [spec]
+        return any(l <= x < r and t <= y < b for l, t, r, b in rects)
+
+    def matches(self, rule, x, y, t, button):
+        if "region" in rule and not self.in_region(rule["region"], x, y):
+            return False
+        if "button" in rule and rule["button"] != button:
+            return False
+        if rule.get("modifiers") and not set(rule["modifiers"]) <= self.held:
+            return False
+        if "cooldown_ms" in rule and (self.last_capture is None or (t - self.last_capture) * 1000 >= rule["cooldown_ms"]):
+            return False
+        return True
+
+    def accept(self, pressed, x, y, t, button):
+        """True if the event should be recorded"""
+        if not pressed:
+            if button in self.skipped_buttons:
+                self.skipped_buttons.discard(button)
+                return False
+            return True
+        
+        for i, rule in enumerate(self.rules):
+            if self.matches(rule, x, y, t, button):
+                if rule.get("action", "skip") == "capture":
+                    break
+                name = rule.get("name", f"Regel {i + 1}")
+                self.skipped[name] = self.skipped.get(name, 0) + 1
+                self.skipped_buttons.add(button)
+                return False
+        self.last_capture = t
+        return True
+
+def com_method(obj, index, *argtypes):
+    """Method index of a COM interface pointer's vtable as a callable (HRESULT errors raise OSError)"""
+    vtbl = ctypes.cast(obj, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))[0]
+    return ctypes.WINFUNCTYPE(ctypes.HRESULT, ctypes.c_void_p, *argtypes)(vtbl[index])
+
+class FocusInspector(threading.local):
+    """UI Automation client of the calling thread (COM objects belong to the thread that made them)"""
+    CLSID_CUIAutomation = "{FF48DBA4-60EF-4201-AA87-54103EEF594E}"
+    IID_IUIAutomation = "{30CBE57D-D9D0-452A-AB13-7AC5AC4825EE}"
+    # Vtable slots, see UIAutomationClient.h
+    GET_FOCUSED_ELEMENT = 8  # IUIAutomation::GetFocusedElement
+    GET_IS_PASSWORD = 35     # IUIAutomationElement::get_CurrentIsPassword
+    RELEASE = 2              # IUnknown::Release
+
+    def __init__(self):
+        self.automation = None
+        try:
+            ole32 = ctypes.oledll.ole32
+            try:
+                ole32.CoInitializeEx(None, 0) # COINIT_MULTITHREADED
+            except OSError:
+                pass # Already initialized in another mode, still usable
+            clsid, iid = (ctypes.c_byte * 16)(), (ctypes.c_byte * 16)()
+            ole32.CLSIDFromString(self.CLSID_CUIAutomation, ctypes.byref(clsid))
+            ole32.IIDFromString(self.IID_IUIAutomation, ctypes.byref(iid))
+            automation = ctypes.c_void_p()
+            ole32.CoCreateInstance(ctypes.byref(clsid), None, 1, ctypes.byref(iid), ctypes.byref(automation)) # CLSCTX_INPROC_SERVER
+            self.automation = automation
+        except Exception as e:
+            print(f"UI Automation unavailable: {e}")
+
+    def is_password(self):
+        """IsPassword of the focused element, None if it can't be read"""
+        if not self.automation:
+            return None
+        element = ctypes.c_void_p()
+        try:
+            com_method(self.automation, self.GET_FOCUSED_ELEMENT, ctypes.POINTER(ctypes.c_void_p))(self.automation, ctypes.byref(element))
+            if not element:
+                return None
+            value = ctypes.c_int()
+            com_method(element, self.GET_IS_PASSWORD, ctypes.POINTER(ctypes.c_int))(element, ctypes.byref(value))
+            return bool(value.value)
+        except OSError:
+            return None
+        finally:
+            if element:
+                ctypes.WINFUNCTYPE(ctypes.c_ulong, ctypes.c_void_p)(
+                    ctypes.cast(element, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))[0][self.RELEASE])(element)
+
+_focus_inspector = None
+
+def focused_control_is_password():
+    """True if the keyboard focus is in a password field, None if that can't be detected.
+    Windows asks UI Automation (covers browsers, UWP and most toolkits), then falls back
+    to the Win32 ES_PASSWORD style; other platforms can't be inspected and report None."""
+    global _focus_inspector
+    if os.name != 'nt':
+        return None
+    if _focus_inspector is None:
+        _focus_inspector = FocusInspector()
+    is_password = _focus_inspector.is_password()
+    if is_password is not None:
+        return is_password
+    try:
+        from ctypes import wintypes
+        class GUITHREADINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.DWORD), ("flags", wintypes.DWORD),
+                        ("hwndActive", wintypes.HWND), ("hwndFocus", wintypes.HWND),
+                        ("hwndCapture", wintypes.HWND), ("hwndMenuOwner", wintypes.HWND),
+                        ("hwndMoveSize", wintypes.HWND), ("hwndCaret", wintypes.HWND),
+                        ("rcCaret", wintypes.RECT)]
+        info = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+        user32 = ctypes.windll.user32
+        if not user32.GetGUIThreadInfo(0, ctypes.byref(info)) or not info.hwndFocus:
+            return None
+        ES_PASSWORD = 0x0020
+        GWL_STYLE = -16
+        return bool(user32.GetWindowLongW(info.hwndFocus, GWL_STYLE) & ES_PASSWORD)
+    except Exception:
+        return None
+
+class TypingAggregator:
+    """Collects typed characters into one text input. An input ends on Enter/Tab
+    or after a typing pause; keys pressed together with Ctrl/Alt/Cmd (shortcuts)
+    are ignored. Only the finished input triggers a screenshot."""
+    SHORTCUT_MODIFIERS = {"ctrl", "ctrl_l", "ctrl_r", "alt", "alt_l", "alt_r", "cmd", "cmd_l", "cmd_r"}
+
+    def __init__(self, pause=1.2):
+        self.pause = pause
+        self.chars = []
+        self.held = set()
+        self.last_t = None
+        self.is_password = False
+
+    def key_down(self, key, t):
+        """Returns True if this key finishes the current input"""
+        name = getattr(key, 'name', None)
+        if name:
+            if name in self.SHORTCUT_MODIFIERS or name == "alt_gr":
+                self.held.add(name)
+                return False
+            if name in ("enter", "tab"):
+                return bool(self.chars)
+            if name == "backspace":
+                if self.chars: self.chars.pop()
+            elif name == "space":
+                self.chars.append(" ")
+            else:
+                return False
+            self.last_t = t
+            return False
+        
+        char = getattr(key, 'char', None)
+        # AltGr is reported as Ctrl+Alt on Windows but produces characters like @
+        shortcut = (self.held & self.SHORTCUT_MODIFIERS) and "alt_gr" not in self.held
+        if char and char.isprintable() and not shortcut:
+            self.chars.append(char)
+            self.last_t = t
+        return False
+
+    def key_up(self, key):
+        self.held.discard(getattr(key, 'name', None))
+
+    def has_text(self):
+        return bool(self.chars)
+
+    def due(self, now):
+        return bool(self.chars) and now - self.last_t >= self.pause
+
+    def take(self):
+        text = "".join(self.chars)
+        if self.is_password:
+            text = "•" * len(text)
+        self.chars = []
+        self.is_password = False
+        return text
+
+class LatencyMonitor:
+    """Click-to-capture latency of a recording session.
+    Each step's meta['timings'] holds the stage times in ms after the input event
+    (pynput callback): dequeue, grab_start, grab_end, convert_end, emit, handled.
+    Keeps rolling p50/p95 of the total (handled) latency for the overlay and writes a
+    JSON report with per-stage percentiles at the end of the session."""
+    STAGES = ("dequeue", "grab_start", "grab_end", "convert_end", "emit", "handled")
+
+    def __init__(self, window=50):
+        self.recent = deque(maxlen=window)
+        self.samples = []
+        self.max_queue_depth = 0
+        self.started = datetime.now()
+
+    def add(self, timings, queue_depth=0):
+        self.samples.append(timings)
+        if 'handled' in timings:
+            self.recent.append(timings['handled'])
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def rolling(self):
+        """(p50, p95) of the recent total latencies in ms, None without samples"""
+        if not self.recent: return None
+        p50, p95 = np.percentile(list(self.recent), [50, 95])
+        return p50, p95
+
+    def report(self, settings, monitors=None):
+        stages = {}
+        for stage in self.STAGES:
+            values = [s[stage] for s in self.samples if stage in s]
+            if values:
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                stages[stage] = {'p50_ms': round(p50, 1), 'p95_ms': round(p95, 1), 'p99_ms': round(p99, 1),
+                                 'max_ms': round(max(values), 1), 'count': len(values)}
+        return {
+            'session': self.started.isoformat(timespec='seconds'),
+            'machine': {'platform': platform.platform(), 'cpus': os.cpu_count(),
+                        'python': platform.python_version(), 'monitors': monitors or []},
+            'capture': {key: getattr(settings, key) for key in AppSettings.CAPTURE_DEFAULTS if key.startswith("capture_")},
+            'steps': len(self.samples),
+            'max_queue_depth': self.max_queue_depth,
+            'stages': stages,
+            'samples': self.samples
+        }
+
+    def write_report(self, settings, monitors=None):
+        """Save the report next to the settings, returns its path (None if nothing was recorded)"""
+        if not self.samples: return None
+        path = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "reports",
+                            f"latency_{self.started.strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(settings, monitors), f, indent=4)
+        return path
+
+class RecordingSignal(QObject):
+    click_detected = pyqtSignal(int, int, str, object, object)
+    click_coalesced = pyqtSignal(int) # Click count of the last step after a double-click/burst
+    typing_detected = pyqtSignal(str, object, object) # Typed text, screenshot after typing, meta
+    capture_skipped = pyqtSignal(object) # Rule name -> clicks skipped by the CaptureFilter, sent at the end of a session
+
+class CapturePipeline:
+    """Input hooks, screen capture and step detection of one recording session.
+    Runs inside RecordingThread or in the capture worker process; results leave through
+    emit(kind, *args) with kind "click" (x, y, label, img, meta), "coalesced" (count)
+    or "typing" (text, img, meta)."""
+    # Hook callbacks must never block: input beyond this backlog is dropped
+    MAX_PENDING_EVENTS = 256
+
+    def __init__(self, settings, emit, monitors=None, region=None, zones=None, source=None, scales=None):
+        self.settings = settings
+        self.emit = emit
+        self.source = source # ScriptedSource replaces the desktop (pynput hooks and screen) when set
+        self.capture_filter = CaptureFilter(settings.capture_rules, zones)
         self.is_running = False
-        self.event_queue = queue.Queue()
+        self.event_queue = queue.Queue(maxsize=self.MAX_PENDING_EVENTS)
+        self.ring = None
+        self.ring_bbox = None
+        self.backend = None
+        self.last_pos = None # Last click position, typed text is captured on that monitor
+        self.monitors = monitors or []
+        self.scales = scales or [1.0] * len(self.monitors) # Display scale per monitor
+        self.region = region
+        self.t_dequeue = 0.0
+        self.queue_depth = 0
+
+    def desktop_rect(self):
+        if not self.monitors: return None
+        return (min(m[0] for m in self.monitors), min(m[1] for m in self.monitors),
+                max(m[2] for m in self.monitors), max(m[3] for m in self.monitors))
+
+    def capture_bbox(self, x, y):
+        """Screen area to capture for a click, None if the click is outside the recorded area"""
+        scope = self.settings.capture_scope
+        if scope == "region" and self.region:
+            l, t, r, b = self.region
+            return self.region if l <= x < r and t <= y < b else None
+        if scope == "monitor":
+            for rect in self.monitors:
+                l, t, r, b = rect
+                if l <= x < r and t <= y < b:
+                    return rect
+        return self.desktop_rect()
+
+    def grab(self, bbox):
+        return self.backend.grab(bbox)
+
+    def capture_scale(self, bbox, shape=None):
+        """Downscale factor of the resolution policy for a capture area (1.0 = native)"""
+        policy = self.settings.capture_resolution
+        if policy == "1x":
+            # Areas spanning mixed-DPI monitors keep the detail of the least scaled one
+            scales = [s for (l, t, r, b), s in zip(self.monitors, self.scales)
+                      if bbox is None or (l < bbox[2] and bbox[0] < r and t < bbox[3] and bbox[1] < b)]
+            return 1.0 / max(1.0, min(scales)) if scales else 1.0
+        if policy == "max_edge":
+            if bbox:
+                w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            elif shape:
+                h, w = shape[:2]
+            elif self.monitors: # Full virtual screen
+                w = max(r for _, _, r, _ in self.monitors) - min(l for l, _, _, _ in self.monitors)
+                h = max(b for _, _, _, b in self.monitors) - min(t for _, t, _, _ in self.monitors)
+            else:
+                return 1.0
+            return min(1.0, self.settings.capture_max_edge / max(w, h, 1))
+        return 1.0
 
-    def run(self):
+    def run(self, keep_running):
+        """Record until keep_running() returns False"""
         self.is_running = True
-        self.mouse_listener = mouse.Listener(on_click=self.on_click)
-        self.mouse_listener.start()
-        
-        while self.is_running:
+        self.mode = self.settings.capture_mode
+        self.backend = self.source.backend if self.source else create_capture_backend(self.settings.capture_backend)
+        
+        self.dedup = DuplicateFilter(self.settings.capture_dedup_distance)
+        coalescer = GestureCoalescer(self.settings.capture_coalesce_ms / 1000.0,
+                                     self.settings.capture_coalesce_px,
+                                     self.settings.capture_drag_px)
+        
+        grabber = None
+        self.timeline = None
+        if self.mode in ("ring", "video"):
+            # The ring/timeline covers the whole recorded area, clicks crop their part out of it
+            self.ring_bbox = self.region if self.settings.capture_scope == "region" and self.region else self.desktop_rect()
+        if self.mode == "video":
+            try:
+                first = self.backend.to_bgr(self.grab(self.ring_bbox))
+                self.timeline = VideoTimeline.create((first.shape[1], first.shape[0]), max(1, self.settings.capture_video_fps))
+            except Exception as e:
+                print(f"Video timeline unavailable, capturing still images: {e}")
+                self.mode = "click"
+        if self.mode == "ring":
+            fps = max(1, self.settings.capture_fps)
+            self.ring = FrameRingBuffer(self.settings.capture_ring_size)
+            grabber = threading.Thread(target=self.ring_grab_loop, args=(1.0 / fps, self.ring.push), daemon=True)
+            grabber.start()
+        elif self.mode == "video":
+            # About a second of frames stays in memory as well, steps are cut out of it right away
+            self.ring = FrameRingBuffer(self.timeline.fps + 2)
+            grabber = threading.Thread(target=self.ring_grab_loop, args=(1.0 / self.timeline.fps, self.store_timeline_frame), daemon=True)
+            grabber.start()
+        else:
+            self.settle = SettleDetector(max_wait=self.settings.capture_settle_max_ms / 1000.0,
+                                         min_wait=self.settings.capture_settle_min_ms / 1000.0,
+                                         threshold=self.settings.capture_settle_threshold)
+        
+        self.scroll = None
+        self.typing = None
+        if self.settings.capture_keyboard:
+            self.typing = TypingAggregator(self.settings.capture_typing_pause_ms / 1000.0)
+        
+        self.mouse_listener = None
+        self.keyboard_listener = None
+        if self.source:
+            self.source.start(self) # Feeds the same hook callbacks as the listeners
+        else:
+            from pynput import mouse, keyboard # Needs a desktop session (X server on Linux), not imported for headless runs
+            self.mouse_listener = mouse.Listener(on_click=self.on_click,
+                                                 on_scroll=self.on_scroll if self.settings.capture_scroll else None)
+            self.mouse_listener.start()
+            if self.typing or self.capture_filter.uses_modifiers():
+                self.keyboard_listener = keyboard.Listener(on_press=self.on_key_press, on_release=self.on_key_release)
+                self.keyboard_listener.start()
+        
+        while keep_running():
             try:
-                # Wait for click event with short timeout to check is_running
+                # Wait for input event with short timeout to check is_running
                 # Non-blocking allows us to exit clean
-                x, y = self.event_queue.get(timeout=0.05)
-                
-                # Perform the delay and capture here in the thread, NOT in the hook
-                time.sleep(0.12)
-                
-                raw = ImageGrab.grab()
-                img = cv2.cvtColor(np.array(raw), cv2.COLOR_RGB2BGR)
-                self.signals.click_detected.emit(x, y, "Click", img)
-                
+                event = self.event_queue.get(timeout=0.05)
+                self.t_dequeue = time.monotonic()
+                self.queue_depth = self.event_queue.qsize() # Input still waiting behind this event
             except queue.Empty:
+                if self.typing and self.typing.due(time.monotonic()):
+                    self.flush_typing(time.monotonic())
+                if self.scroll:
+                    self.scroll_idle(time.monotonic())
                 continue
+            
+            if event[0] == "end":
+                break # End of a scripted session
+            if event[0] == "scroll":
+                self.scroll_event(*event[1:])
+                continue
+            
+            if event[0] == "key":
+                self.handle_key(event[1], event[2])
+                continue
+            if event[0] == "key_up":
+                self.typing.key_up(event[1])
+                continue
+            
+            # A click ends the current text input / long screenshot, it belongs to the previous step
+            if self.typing and self.typing.has_text():
+                self.flush_typing(event[3])
+            if self.scroll:
+                self.finish_scroll()
+            
+            for action, gesture in coalescer.feed(*event):
+                if action == "merge":
+                    # Double-click / burst on the same spot: no new capture
+                    self.emit("coalesced", gesture['count'])
+                elif not self.capture_gesture(gesture):
+                    coalescer.last_click = None # Nothing recorded, don't merge follow-up clicks into it
                 
-        self.mouse_listener.stop()
+        self.is_running = False
+        if self.source:
+            self.source.stop()
+        if self.mouse_listener:
+            self.mouse_listener.stop()
+        if self.keyboard_listener:
+            self.keyboard_listener.stop()
+        if self.typing and self.typing.has_text():
+            self.flush_typing(time.monotonic())
+        if self.scroll:
+            self.finish_scroll()
+        if grabber:
+            grabber.join(1.0)
+        if self.ring:
+            self.ring.clear()
+        if self.timeline:
+            self.timeline.close()
+            self.timeline = None
+        self.backend.close()
+        self.emit("skipped", dict(self.capture_filter.skipped))
+
+    def capture_gesture(self, g):
+        """Grab the screen for one click/drag gesture and hand it to the UI thread.
+        Returns False if nothing was captured."""
+        x, y, t_click = g['x'], g['y'], g['t']
+        self.last_pos = (x, y)
+        bbox = self.capture_bbox(x, y)
+        if bbox is None and self.settings.capture_scope == "region" and self.region:
+            return False # Click outside the selected region
+        
+        timings = {'dequeue': self.t_dequeue}
+        if self.mode in ("ring", "video"):
+            img, meta = self.pick_from_timeline(t_click, bbox) if self.mode == "video" else self.pick_from_ring(t_click, bbox)
+            if img is None: return False
+            # Ring frames are timestamped at the middle of their grab
+            timings['grab_start'] = timings['grab_end'] = meta.pop('frame_t')
+        else:
+            def timed_grab():
+                # The last grab is the frame that gets used
+                timings['grab_start'] = time.monotonic()
+                raw = self.grab(bbox)
+                timings['grab_end'] = time.monotonic()
+                return raw
+            # Wait for the screen to settle here in the thread, NOT in the hook
+            raw, settle_s, settled = self.settle.capture(timed_grab, self.backend.small, t_click)
+            img = self.backend.to_bgr(raw)
+            meta = {'settle_ms': int(settle_s * 1000), 'settled': settled}
+        timings['convert_end'] = time.monotonic()
+        
+        scale = self.capture_scale(bbox, img.shape)
+        if scale < 1.0:
+            meta['capture_scale'] = round(scale, 4)
+            img = downscale_image(img, scale)
+            if 'hover_img' in meta:
+                meta['hover_img'] = downscale_image(meta['hover_img'], scale)
+        img = self.check_duplicate(img, meta)
+        
+        # Step coordinates are relative to the captured (and scaled) image
+        ox, oy = (bbox[0], bbox[1]) if bbox else (0, 0)
+        meta['capture_offset'] = [ox, oy]
+        meta['button'] = g['button']
+        label = "Click" if g['button'] == "left" else f"{g['button'].title()}-Click"
+        if g['kind'] == "drag":
+            label = "Drag"
+            meta['drag_end'] = [round((g['end'][0] - ox) * scale), round((g['end'][1] - oy) * scale)]
+        timings['emit'] = time.monotonic()
+        meta['timings'] = {stage: round((t - t_click) * 1000, 1) for stage, t in timings.items()}
+        meta['t_input'] = t_click # Completed to 'handled' by the UI, same monotonic clock in worker and UI process
+        meta['queue_depth'] = self.queue_depth
+        self.emit("click", round((x - ox) * scale), round((y - oy) * scale), label, img, meta)
+        return True
+
+    def check_duplicate(self, img, meta):
+        """Unchanged screen: reuse the previous buffer instead of keeping a second copy"""
+        phash, prev_img = self.dedup.check(img)
+        meta['phash'] = f"{phash:x}"
+        if prev_img is not None:
+            meta['duplicate'] = True
+            if self.settings.capture_dedup != "keep":
+                return prev_img
+        return img
+
+    def store_timeline_frame(self, t, raw):
+        """Grab thread: append a frame to the video and keep it in memory for the steps.
+        A failing writer only ends the video (steps keep their frames), not the recording."""
+        timeline = self.timeline
+        if timeline:
+            try:
+                timeline.write(t, self.backend.to_bgr(raw))
+            except Exception as e:
+                print(f"Video timeline stopped, later steps can't re-pick frames: {e}")
+                self.timeline = None
+                timeline.close()
+        self.ring.push(t, raw)
+
+    def pick_from_timeline(self, t, bbox, before=False):
+        """Frame of the video timeline for an input: the first one at/after t, or (before)
+        the last one before t. Taken from the frames in memory, meta['timeline'] lets the
+        editor re-pick it from the video later"""
+        if before:
+            picked = self.ring.before(t) or self.ring.nearest(t)
+        else:
+            self.ring.wait_for(t, 2.0 / max(1, self.settings.capture_video_fps))
+            picked = self.ring.after(t) or self.ring.nearest(t)
+        if picked is None:
+            return None, {}
+        ts, raw = picked
+        meta = {'frame_t': ts}
+        timeline = self.timeline
+        if timeline:
+            crop = None
+            if bbox is not None and self.ring_bbox is not None and bbox != self.ring_bbox:
+                rl, rt = self.ring_bbox[0], self.ring_bbox[1]
+                crop = [bbox[0] - rl, bbox[1] - rt, bbox[2] - rl, bbox[3] - rt]
+            meta['timeline'] = {'video': timeline.path, 'frame': timeline.index_at(ts), 'crop': crop, 'fps': timeline.fps}
+        return self.backend.to_bgr(self.crop_to(raw, bbox)), meta
+
+    def handle_key(self, key, t):
+        starts_input = not self.typing.has_text()
+        finished = self.typing.key_down(key, t)
+        if starts_input and self.typing.has_text() and self.settings.capture_mask_passwords:
+            # Checked once per input, focus doesn't move while typing.
+            # Unknown field type: masked, a leaked password is worse than a hidden text
+            self.typing.is_password = focused_control_is_password() is not False
+        if finished:
+            self.flush_typing(t)
+
+    def current_frame(self, bbox, t):
+        if self.mode == "ring":
+            picked = self.ring.nearest(t)
+            return self.backend.to_bgr(self.crop_to(picked[1], bbox)) if picked else None
+        return self.backend.to_bgr(self.grab(bbox))
+
+    def scroll_event(self, x, y, t):
+        if self.scroll is None:
+            bbox = self.capture_bbox(x, y)
+            if bbox is None and self.settings.capture_scope == "region" and self.region:
+                return
+            if self.typing and self.typing.has_text():
+                self.flush_typing(t)
+            frame = self.current_frame(bbox, t) # Screen at the start of scrolling
+            if frame is None: return
+            self.scroll = {'x': x, 'y': y, 'bbox': bbox, 'stitcher': ScrollStitcher(), 't_frame': t}
+            self.scroll['stitcher'].add(frame)
+        self.scroll['t_last'] = t
+        self.scroll['pending'] = True
+        # Continuous scrolling: keep taking frames so consecutive ones still overlap
+        if time.monotonic() - self.scroll['t_frame'] >= self.settings.capture_scroll_pause_ms / 1000.0:
+            self.scroll_frame(time.monotonic())
+
+    def scroll_frame(self, now):
+        self.scroll['pending'] = False
+        self.scroll['t_frame'] = now
+        frame = self.current_frame(self.scroll['bbox'], now)
+        if frame is not None:
+            self.scroll['stitcher'].add(frame)
+
+    def scroll_idle(self, now):
+        """Take a frame once scrolling pauses, end the long screenshot after a longer pause"""
+        idle = now - self.scroll['t_last']
+        if self.scroll['pending'] and idle >= self.settings.capture_scroll_pause_ms / 1000.0:
+            self.scroll_frame(now)
+        elif idle >= self.settings.capture_scroll_end_ms / 1000.0:
+            self.finish_scroll()
+
+    def finish_scroll(self):
+        if self.scroll['pending']:
+            self.scroll_frame(time.monotonic())
+        scroll, self.scroll = self.scroll, None
+        stitcher = scroll['stitcher']
+        if stitcher.frames < 2:
+            return # Nothing moved, the next click captures this screen anyway
+        
+        self.dedup.reset()
+        bbox = scroll['bbox']
+        ox, oy = (bbox[0], bbox[1]) if bbox else (0, 0)
+        meta = {'scroll_frames': stitcher.frames, 'capture_offset': [ox, oy]}
+        # Based on the capture area, not the stitched height, so all steps get the same scale
+        scale = self.capture_scale(bbox, stitcher.first.shape)
+        if scale < 1.0:
+            meta['capture_scale'] = round(scale, 4)
+        self.emit("click", round((scroll['x'] - ox) * scale), round((scroll['y'] - oy) * scale), "Scroll",
+                  downscale_image(stitcher.result(), scale), meta)
+
+    def flush_typing(self, t_end):
+        """One screenshot for the whole text input, however long it was"""
+        text = self.typing.take()
+        if not text: return
+        
+        bbox = self.capture_bbox(*self.last_pos) if self.last_pos else self.desktop_rect()
+        meta = {'typed': True}
+        if self.mode == "video":
+            img, picked = self.pick_from_timeline(t_end, bbox, before=True)
+            if img is None: return
+            meta.update(picked)
+            meta.pop('frame_t')
+        elif self.mode == "ring":
+            # Prefer the frame before Enter, the app may already react to it
+            picked = self.ring.before(t_end) or self.ring.nearest(t_end)
+            if picked is None: return
+            img = self.backend.to_bgr(self.crop_to(picked[1], bbox))
+        else:
+            img = self.backend.to_bgr(self.grab(bbox))
+        
+        ox, oy = (bbox[0], bbox[1]) if bbox else (0, 0)
+        meta['capture_offset'] = [ox, oy]
+        scale = self.capture_scale(bbox, img.shape)
+        if scale < 1.0:
+            meta['capture_scale'] = round(scale, 4)
+            img = downscale_image(img, scale)
+        self.emit("typing", text, img, meta)
+
+    def ring_grab_loop(self, interval, store):
+        """Keeps the ring buffer / video timeline filled at a fixed rate while recording"""
+        next_t = time.monotonic()
+        while self.is_running:
+            t0 = time.monotonic()
+            raw = self.grab(self.ring_bbox)
+            t1 = time.monotonic()
+            # Timestamp the frame at the middle of the grab
+            store((t0 + t1) / 2, raw)
+            
+            next_t += interval
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic() # Grab is slower than the rate, don't try to catch up
+
+    def crop_to(self, raw, bbox):
+        """Cut the click's capture area out of a ring frame"""
+        if bbox is None or self.ring_bbox is None or bbox == self.ring_bbox:
+            return raw
+        rl, rt = self.ring_bbox[0], self.ring_bbox[1]
+        return self.backend.crop(raw, (bbox[0] - rl, bbox[1] - rt, bbox[2] - rl, bbox[3] - rt))
+
+    def pick_from_ring(self, t_click, bbox):
+        """Select the frame closest to the click time (plus optional hover frame)"""
+        interval = 1.0 / max(1, self.settings.capture_fps)
+        # Wait for at least one frame after the click so "nearest" can look both ways
+        self.ring.wait_for(t_click, interval * 2)
+        picked = self.ring.nearest(t_click)
+        if picked is None:
+            return None, {}
+        
+        ts, raw = picked
+        img = self.backend.to_bgr(self.crop_to(raw, bbox))
+        meta = {'frame_t': ts}
+        
+        if self.settings.capture_hover_frame:
+            hover = self.ring.before(t_click)
+            if hover is not None and hover[1] is not raw:
+                meta['hover_img'] = self.backend.to_bgr(self.crop_to(hover[1], bbox))
+        return img, meta
+
+    def post(self, event):
+        try:
+            self.event_queue.put_nowait(event)
+        except queue.Full:
+            pass # Capture is hopelessly behind, losing input beats freezing the system hook
 
     def on_click(self, x, y, button, pressed):
-        if not pressed: return
         # FAST: Just put into queue and return immediately to unblock system
-        self.event_queue.put((x, y))
+        t = time.monotonic()
+        if self.capture_filter.accept(pressed, x, y, t, button.name):
+            self.post(("press" if pressed else "release", x, y, t, button.name))
+
+    def on_scroll(self, x, y, dx, dy):
+        if dy:
+            self.post(("scroll", x, y, time.monotonic()))
+
+    def on_key_press(self, key):
+        self.capture_filter.key_down(key)
+        if self.typing:
+            self.post(("key", key, time.monotonic()))
+
+    def on_key_release(self, key):
+        self.capture_filter.key_up(key)
+        if self.typing:
+            self.post(("key_up", key, time.monotonic()))
+
+class SharedFrameRing:
+    """Fixed number of frame slots in one shared memory block.
+    The capture process copies a frame into a free slot and sends only its descriptor;
+    the GUI side copies it out and hands the slot back through the free queue.
+    The number of slots is the backpressure limit between the two processes.
+    Only the creating (GUI) process owns and unlinks the block; the worker attaches untracked."""
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(1, slots * slot_bytes))
+        else:
+            self.shm = self.attach(name)
+
+    @staticmethod
+    def attach(name):
+        """Open the block without registering it with a resource tracker. A tracked attach lets
+        the worker's tracker unlink the block the GUI still uses (Python < 3.13). Unregistering
+        afterwards would also drop the creator's entry when both share one tracker (spawn)."""
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None # Worker start-up, no other threads yet
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self, slot, shape, dtype):
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def write(self, slot, img):
+        self.view(slot, img.shape, img.dtype.str)[...] = img
+
+    def read(self, slot, shape, dtype):
+        return self.view(slot, shape, dtype).copy()
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class CaptureWorkerOutput:
+    """emit() of the CapturePipeline inside the worker process.
+    Frames are sent as descriptors: ("shm", id, slot, shape, dtype), ("ref", id) for a
+    buffer sent before (shared duplicate screens) or ("inline", id, array) if a frame
+    doesn't fit a slot.
+    Drop/merge policy: if the GUI holds every slot for longer than wait seconds, the click
+    is sent without an image and merged into the previous step as an extra click marker;
+    typed text is added to the previous step and an optional hover frame is dropped."""
+    KEEP_SENT = 8 # Sent buffers remembered for "ref", the bridge keeps the same number
+
+    def __init__(self, ring, free, results, wait):
+        self.ring = ring
+        self.free = free
+        self.results = results
+        self.wait = wait
+        self.sent = {} # id(buffer) -> (buffer, frame id), insertion ordered
+        self.next_id = 0
+
+    def frame(self, img, wait=None):
+        if img is None: return None
+        known = self.sent.get(id(img))
+        if known and known[0] is img:
+            return ("ref", known[1])
+        
+        self.next_id += 1
+        if img.nbytes > self.ring.slot_bytes:
+            desc = ("inline", self.next_id, img)
+        else:
+            try:
+                timeout = self.wait if wait is None else wait
+                slot = self.free.get(timeout=timeout) if timeout > 0 else self.free.get_nowait()
+            except queue.Empty:
+                return None
+            self.ring.write(slot, img)
+            desc = ("shm", self.next_id, slot, img.shape, img.dtype.str)
+        
+        self.sent[id(img)] = (img, self.next_id)
+        if len(self.sent) > self.KEEP_SENT:
+            del self.sent[next(iter(self.sent))]
+        return desc
+
+    def emit(self, kind, *args):
+        if kind == "click":
+            x, y, label, img, meta = args
+            hover = meta.pop('hover_img', None)
+            desc = self.frame(img)
+            if desc is None:
+                meta['dropped_frame'] = True
+            elif hover is not None:
+                hover_desc = self.frame(hover, wait=0) # Optional, never wait for it
+                if hover_desc: meta['hover_img'] = hover_desc
+            self.results.put(("click", x, y, label, desc, meta))
+        elif kind == "typing":
+            text, img, meta = args
+            desc = self.frame(img)
+            if desc is None:
+                meta['dropped_frame'] = True
+            self.results.put(("typing", text, desc, meta))
+        else:
+            self.results.put((kind,) + args)
+
+def capture_worker_main(settings, monitors, scales, region, zones, source, shm_name, slots, slot_bytes, free, results, stop):
+    """Entry point of the capture worker process"""
+    ring = SharedFrameRing(slots, slot_bytes, name=shm_name)
+    output = CaptureWorkerOutput(ring, free, results, settings.capture_queue_wait_ms / 1000.0)
+    try:
+        CapturePipeline(settings, output.emit, monitors, region, zones, source, scales).run(lambda: not stop.is_set())
+    finally:
+        output.sent.clear()
+        results.put(("done",))
+        ring.close()
+
+class RecordingThread(QThread):
+    """Runs the CapturePipeline in this thread, or (capture_process) starts it in a worker
+    process and forwards its results as Qt signals"""
+    def __init__(self, settings=None):
+        super().__init__()
+        self.signals = RecordingSignal()
+        self.settings = settings if settings else AppSettings()
+        self.is_running = False
+        # Set by the recorder before start()
+        self.monitors = []
+        self.region = None
+        self.zones = {}
+        self.source = None # ScriptedSource for headless runs
+        self.scales = []
+
+    def run(self):
+        self.is_running = True
+        pipeline = CapturePipeline(self.settings, self.forward, self.monitors, self.region, self.zones,
+                                   self.source, self.scales)
+        if self.settings.capture_process and self.run_worker_process(pipeline):
+            return
+        pipeline.run(lambda: self.is_running)
+
+    def forward(self, kind, *args):
+        if kind == "click":
+            self.signals.click_detected.emit(*args)
+        elif kind == "coalesced":
+            self.signals.click_coalesced.emit(*args)
+        elif kind == "typing":
+            self.signals.typing_detected.emit(*args)
+        elif kind == "skipped":
+            self.signals.capture_skipped.emit(*args)
+
+    def run_worker_process(self, pipeline):
+        """Returns False if the worker could not be started (caller captures in-process)"""
+        rect = self.region if self.settings.capture_scope == "region" and self.region else pipeline.desktop_rect()
+        # A slot holds the largest possible capture (BGR, 8 bit)
+        slot_bytes = (rect[2] - rect[0]) * (rect[3] - rect[1]) * 3 if rect else 3840 * 2160 * 3
+        slots = max(2, self.settings.capture_shm_slots)
+        
+        ctx = multiprocessing.get_context("spawn")
+        ring = None
+        try:
+            ring = SharedFrameRing(slots, slot_bytes)
+            free, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+            for slot in range(slots):
+                free.put(slot)
+            proc = ctx.Process(target=capture_worker_main, daemon=True,
+                               args=(self.settings, self.monitors, self.scales, self.region, self.zones, self.source, ring.name,
+                                     slots, slot_bytes, free, results, stop))
+            proc.start()
+        except Exception as e:
+            print(f"Capture process unavailable, capturing in-process: {e}")
+            if ring:
+                ring.close() # Created here, unlinked here
+            return False
+        
+        frames = {} # frame id -> received image, for "ref" descriptors
+        done = False
+        while self.is_running and proc.is_alive() and not done:
+            try:
+                done = self.deliver(results.get(timeout=0.05), ring, free, frames)
+            except queue.Empty:
+                continue
+        
+        # Let the worker finish pending typing and hand over what it already captured
+        stop.set()
+        while not done:
+            try:
+                done = self.deliver(results.get(timeout=1.0), ring, free, frames)
+            except queue.Empty:
+                break
+        proc.join(1.0)
+        if proc.is_alive():
+            proc.terminate()
+        frames.clear()
+        ring.close()
+        return True
+
+    def receive_frame(self, desc, ring, free, frames):
+        if desc is None: return None
+        if desc[0] == "ref":
+            return frames.get(desc[1])
+        if desc[0] == "shm":
+            _, frame_id, slot, shape, dtype = desc
+            img = ring.read(slot, shape, dtype)
+            free.put(slot)
+        else:
+            _, frame_id, img = desc
+        frames[frame_id] = img
+        if len(frames) > CaptureWorkerOutput.KEEP_SENT:
+            del frames[next(iter(frames))]
+        return img
+
+    def deliver(self, msg, ring, free, frames):
+        """Turn a worker message back into a signal, returns True for the final message"""
+        kind = msg[0]
+        if kind == "done":
+            return True
+        if kind == "click":
+            x, y, label, desc, meta = msg[1:]
+            img = self.receive_frame(desc, ring, free, frames)
+            if 'hover_img' in meta:
+                meta['hover_img'] = self.receive_frame(meta['hover_img'], ring, free, frames)
+            self.forward(kind, x, y, label, img, meta)
+        elif kind == "typing":
+            text, desc, meta = msg[1:]
+            self.forward(kind, text, self.receive_frame(desc, ring, free, frames), meta)
+        else:
+            self.forward(*msg)
+        return False
 
 class ProRecorder(QMainWindow):
     hotkey_signal = pyqtSignal(str)
     
-    def __init__(self):
+    def __init__(self, offer_recovery=True, hotkeys=True):
         super().__init__()
         
         # Windows Taskbar Icon Fix
@@ -3465,30 +6891,106 @@ class ProRecorder(QMainWindow):
         
         self.settings = AppSettings()
         self.apply_app_theme()
+        StepImageStore.instance().configure(self.settings.image_memory_mb, self.settings.image_compressed_mb)
         
         self.steps = []
         self.global_layers = []
         self.global_crop = None
         self.is_recording = False
+        self.append_target = None # Project name while recording in append mode
+        self.journal = None
+        self.latency = LatencyMonitor()
+        self.change_detector = ChangeDetector()
         self.overlay = RecordingOverlay() # Create overlay
         
-        self.recording_thread = RecordingThread()
+        self.recording_thread = RecordingThread(self.settings)
         self.recording_thread.signals.click_detected.connect(self.handle_click)
+        self.recording_thread.signals.click_coalesced.connect(self.handle_coalesced_click)
+        self.recording_thread.signals.typing_detected.connect(self.handle_typing)
+        self.recording_thread.signals.capture_skipped.connect(self.handle_capture_skipped)
+        self.recording_thread.finished.connect(self.finish_recording) # After the thread's last steps
+        self.recording_stopping = False
         
         # Connect hotkey signal to ensure thread-safe UI calls
         self.hotkey_signal.connect(self.handle_hotkey)
         
         self.setup_ui()
-        self.setup_hotkeys()
+        if hotkeys:
+            self.setup_hotkeys()
+        
+        # Project list from the catalog, refreshed when the projects folder changes
+        self.catalog = ProjectCatalog(self.get_project_dir())
+        self.cover_icons = {} # (cover file, mtime) -> QIcon
+        self.project_list_timer = QTimer(self)
+        self.project_list_timer.setSingleShot(True)
+        self.project_list_timer.setInterval(300) # A save touches several files
+        self.project_list_timer.timeout.connect(self.update_project_list)
+        self.project_watcher = QFileSystemWatcher([self.get_project_dir()], self)
+        self.project_watcher.directoryChanged.connect(lambda path: self.project_list_timer.start())
         self.update_project_list()
+        if offer_recovery:
+            QTimer.singleShot(0, self.offer_journal_recovery)
+
+    def update_app_zone(self):
+        """Keep the 'app' capture zone in step with the window state (the dict is shared with the pipeline)"""
+        zones = self.recording_thread.zones
+        if "app_windows" in zones:
+            return # Checked live at click time
+        zones["app"][:] = get_capture_zones([self])["app"] if self.isVisible() and not self.isMinimized() else []
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and self.is_recording:
+            self.update_app_zone()
+        super().changeEvent(event)
 
     def closeEvent(self, event):
         """Cleanup thread before closing"""
         if hasattr(self, 'recording_thread'):
             self.recording_thread.is_running = False
             self.recording_thread.wait(500)
+        # Regular exit: unsaved recordings are dropped on purpose, only crashes leave a journal
+        self.discard_journal()
         event.accept()
 
+    def offer_journal_recovery(self):
+        """Offer to restore a session that was interrupted by a crash or power loss"""
+        for path in SessionJournal.find_interrupted():
+            try:
+                steps = SessionJournal.load(path)
+            except Exception as e:
+                print(f"Journal {path} unreadable: {e}")
+                steps = []
+            if not steps:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            
+            dlg = ModernDialog("Aufnahme wiederherstellen",
+                               f"Eine unterbrochene Aufnahme mit {len(steps)} Schritten wurde gefunden. Wiederherstellen?",
+                               mode="confirm", parent=self)
+            if dlg.exec():
+                # Keep the journal until the recovered steps are saved as a project
+                self.journal = SessionJournal(path)
+                self.steps = steps
+                self.global_layers = []
+                self.global_crop = None
+                self.open_editor()
+                return
+            shutil.rmtree(path, ignore_errors=True)
+
+    def discard_journal(self):
+        if self.journal:
+            self.journal.discard()
+            self.journal = None
+
+    def analyze_step(self, step):
+        """Queue the change-region diff against the previous step"""
+        idx = self.steps.index(step)
+        self.change_detector.submit(step, self.steps[idx - 1] if idx > 0 else None)
+
+    def journal_step(self, step):
+        if self.journal and step in self.steps:
+            self.journal.record_step(self.steps.index(step), step)
+
     def get_project_dir(self):
         """Returns the project directory in Local AppData for Store compliance"""
         base = os.environ.get('LOCALAPPDATA', os.path.expanduser("~"))
@@ -3716,6 +7218,7 @@ class ProRecorder(QMainWindow):
             self.settings.shortcut_editor: lambda: self.hotkey_signal.emit("editor")
         }
         try:
+            from pynput import keyboard
             self.hotkey_thread = keyboard.GlobalHotKeys(h)
             self.hotkey_thread.start()
         except Exception as e:
@@ -3752,6 +7255,7 @@ class ProRecorder(QMainWindow):
         
         self.proj_list = QListWidget()
         self.proj_list.setObjectName("ProjectList")
+        self.proj_list.setIconSize(QSize(64, 36))
         side_layout.addWidget(self.proj_list)
         
         # Sidebar Buttons
@@ -3763,12 +7267,19 @@ class ProRecorder(QMainWindow):
         btn_open.setFixedHeight(40)
         btn_open.clicked.connect(self.load_project)
         
+        btn_append = QPushButton("➕")
+        btn_append.setObjectName("PrimarySidebarBtn")
+        btn_append.setFixedSize(40, 40)
+        btn_append.setToolTip("Neue Schritte an das Projekt anhängen")
+        btn_append.clicked.connect(self.append_to_project)
+        
         btn_del = QPushButton("🗑️")
         btn_del.setObjectName("DeleteBtn")
         btn_del.setFixedSize(40, 40)
         btn_del.clicked.connect(self.delete_project)
         
         btn_layout.addWidget(btn_open)
+        btn_layout.addWidget(btn_append)
         btn_layout.addWidget(btn_del)
         side_layout.addLayout(btn_layout)
         
@@ -3820,15 +7331,34 @@ class ProRecorder(QMainWindow):
 
     def toggle_recording(self):
         if not self.is_recording:
+            if self.recording_thread.isRunning():
+                return # Previous session still handing over its last steps
+            # Capture area is fixed for the whole session
+            source = self.recording_thread.source
+            self.recording_thread.monitors = source.monitors if source else get_monitor_rects()
+            self.recording_thread.scales = [1.0] * len(source.monitors) if source else get_monitor_scales(self.recording_thread.monitors)
+            self.recording_thread.zones = get_capture_zones([self]) # Clicks on the window are skipped only while it is shown
+            self.recording_thread.region = None
+            if self.settings.capture_scope == "region":
+                selector = RegionSelector()
+                if not selector.exec() or not selector.region:
+                    return
+                self.recording_thread.region = selector.region
+            
             self.is_recording = True
             self.steps = []
+            self.discard_journal()
+            self.journal = SessionJournal.create()
+            self.latency = LatencyMonitor()
+            self.overlay.update_latency(None)
             self.btn_record.setText("AUFNAHME STOPPEN")
             self.showMinimized()
+            self.update_app_zone()
             
             # Reset and show overlay
             self.overlay.update_steps(0)
             screen = QApplication.primaryScreen().geometry()
-            self.overlay.setGeometry(screen.width() - 260, 30, 240, 60)
+            self.overlay.setGeometry(screen.width() - 440, 30, 420, 60)
             self.overlay.show() 
             self.recording_thread.start()
         else:
@@ -3841,16 +7371,139 @@ class ProRecorder(QMainWindow):
         self.btn_record.setText("NEUE AUFNAHME STARTEN")
         self.showNormal()
         
-        # Give thread a moment to finish
-        self.recording_thread.wait(500) # Wait max 500ms
+        # The rest waits for the thread's finished signal, the UI stays responsive meanwhile
+        self.recording_stopping = True
+        if not self.recording_thread.isRunning():
+            self.finish_recording()
+
+    def finish_recording(self):
+        """Runs once the recording thread is done; its queued steps have been handled before"""
+        if not self.recording_stopping:
+            return # Thread ended by itself (scripted session), stop_recording() follows
+        self.recording_stopping = False
+        if self.journal:
+            self.journal.close() # Flush pending images, keep the journal until the project is saved
+        try:
+            report = self.latency.write_report(self.settings, self.recording_thread.monitors)
+            if report:
+                print(f"Latency report: {report}")
+        except Exception as e:
+            print(f"Latency report failed: {e}")
         
+        target, self.append_target = self.append_target, None
+        if self.steps and target:
+            try:
+                added = self.append_steps(target, self.steps)
+                self.discard_journal()
+                self.steps = []
+                self.update_project_list()
+                QMessageBox.information(self, "Erfolg", f"{added} Schritte an '{target}' angehängt!")
+                return
+            except Exception as e:
+                # Recording is not lost: continue in the editor as a new project
+                QMessageBox.critical(self, "Fehler", f"Anhängen fehlgeschlagen: {str(e)}")
         if self.steps:
             self.open_editor()
 
-    def handle_click(self, x, y, label, img):
-        self.steps.append(Step(img, x, y, label))
+    def append_to_project(self):
+        """Record new steps straight into the selected project"""
+        name = self.selected_project()
+        if not name or self.is_recording: return
+        if not open_project_storage(self.get_project_dir(), name).exists():
+            QMessageBox.warning(self, "Fehler", "Projekt-Datei nicht gefunden!")
+            return
+        self.append_target = name
+        self.toggle_recording()
+        if not self.is_recording: # Region selection cancelled
+            self.append_target = None
+
+    def append_steps(self, name, steps):
+        """Write only the new images and patch project.json.
+        The project's existing images are never read, so this stays fast for long guides."""
+        return open_project_storage(self.get_project_dir(), name, codec=self.settings.image_codec).append(steps)
+
+    def handle_click(self, x, y, label, img, meta=None):
+        meta = dict(meta) if meta else {}
+        drag_end = meta.get('drag_end')
+        self.record_latency(meta)
+        
+        if img is None and not self.steps:
+            return # Frame dropped by the capture process and nothing to merge it into
+        if img is None or (meta.get('duplicate') and self.settings.capture_dedup == "merge" and self.steps):
+            # Same screen as the previous step (or its frame was dropped): only record the additional click position
+            step = self.steps[-1]
+            step.layers.append(Layer('click', {'x': x, 'y': y}, label))
+            step.meta['merged_clicks'] = step.meta.get('merged_clicks', 0) + 1
+        else:
+            step = Step(img, x, y, label)
+            step.hover_img = meta.pop('hover_img', None)
+            step.meta.update(meta)
+            if meta.get('scroll_frames'):
+                step.layers = [] # Long screenshot, no click to mark
+            self.steps.append(step)
+            self.analyze_step(step)
+        
+        if drag_end:
+            # Drag = one step with click marker at the start and an arrow to the end point
+            step.layers.append(Layer('arrow', {'sx': x, 'sy': y, 'ex': drag_end[0], 'ey': drag_end[1],
+                                               'color': (255, 0, 0), 'width': 4}, "Drag"))
+        self.journal_step(step)
         self.overlay.update_steps(len(self.steps))
 
+    def handle_capture_skipped(self, counts):
+        """Report the clicks the capture rules filtered out"""
+        if not counts: return
+        text = "Übersprungene Klicks: " + ", ".join(f"{name} {n}" for name, n in counts.items())
+        print(text)
+        window = self.editor if getattr(self, 'editor', None) and self.editor.isVisible() else self
+        window.statusBar().showMessage(text, 10000)
+
+    def record_latency(self, meta):
+        """Complete the capture timings with the UI stage and refresh the overlay"""
+        t_input = meta.pop('t_input', None)
+        if t_input is None or 'timings' not in meta: return
+        meta['timings']['handled'] = round((time.monotonic() - t_input) * 1000, 1)
+        queue_depth = meta.pop('queue_depth', 0)
+        self.latency.add(meta['timings'], queue_depth)
+        self.overlay.update_latency(self.latency.rolling(), queue_depth)
+
+    def handle_typing(self, text, img, meta):
+        """Typed text goes into the current step's description; the screenshot taken
+        after typing replaces its image so the filled-in field is visible"""
+        entry = f'Eingabe: "{text}"'
+        if img is None and not self.steps:
+            return
+        if self.steps and (img is None or self.steps[-1].image_ref.shape == img.shape):
+            step = self.steps[-1]
+            if step.description in ("", "Drag") or step.description.endswith("Click"): # Still the auto label
+                step.description = entry
+            else:
+                step.description += "\n" + entry
+            if img is not None: # Dropped frame: keep the previous screenshot
+                step.raw_img = img
+                self.analyze_step(step)
+            step.meta.update(meta)
+            self.journal_step(step)
+            return
+        
+        # Typing without a preceding click on this screen: own step without click marker
+        step = Step(img, 0, 0, entry)
+        step.layers = []
+        step.meta.update(meta)
+        self.steps.append(step)
+        self.analyze_step(step)
+        self.journal_step(step)
+        self.overlay.update_steps(len(self.steps))
+
+    def handle_coalesced_click(self, count):
+        """Second/third click of a double-click or burst: annotate the last step"""
+        if not self.steps: return
+        step = self.steps[-1]
+        step.meta['click_count'] = count
+        if step.description in ("Click", "Double-Click") or step.description.endswith("x Click"):
+            step.description = "Double-Click" if count == 2 else f"{count}x Click"
+        self.journal_step(step)
+
     def open_editor(self, project_name=None):
         self.hide() # Hide main recorder
         self.editor = ProEditor(self.steps, self.global_layers, self.global_crop, self.final_export, project_name=project_name, parent_window=self, settings=self.settings)
@@ -3866,9 +7519,13 @@ class ProRecorder(QMainWindow):
             self.settings.theme = new_data["theme"]
             self.settings.shortcut_record = new_data["shortcut_record"]
             self.settings.shortcut_editor = new_data["shortcut_editor"]
+            for key in AppSettings.CAPTURE_DEFAULTS:
+                if key in new_data:
+                    setattr(self.settings, key, new_data[key])
             
             # Persistence
             self.settings.save()
+            StepImageStore.instance().configure(self.settings.image_memory_mb, self.settings.image_compressed_mb)
             
             # Apply immediate changes
             self.apply_app_theme()
@@ -3879,6 +7536,8 @@ class ProRecorder(QMainWindow):
 
     def final_export(self, steps, global_layers, global_crop):
         if not steps: # This is a refresh signal for project list
+            # Sent after a project save: the recorded session is safe on disk now
+            self.discard_journal()
             self.update_project_list()
             return
             
@@ -4142,37 +7801,60 @@ class ProRecorder(QMainWindow):
 
     def update_project_list(self):
         """Update project list in sidebar"""
-        self.proj_list.clear()
         path = self.get_project_dir()
         if not os.path.exists(path): 
             os.makedirs(path)
-        for d in os.listdir(path):
-            if os.path.isdir(os.path.join(path, d)):
-                item = QListWidgetItem(d)
-                self.proj_list.addItem(item)
+        self.catalog.refresh()
+        
+        selected = self.selected_project()
+        icons, self.cover_icons = self.cover_icons, {}
+        self.proj_list.clear()
+        # Newest first
+        for name, e in sorted(self.catalog.entries.items(), key=lambda kv: kv[1].get("mtime") or 0, reverse=True):
+            info = f"{e['steps']} Schritte"
+            if e.get("mtime"):
+                info += f" · {datetime.fromtimestamp(e['mtime']).strftime('%d.%m.%Y %H:%M')}"
+            item = QListWidgetItem(f"{name}\n{info}")
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            item.setToolTip(f"{name}\n{info} · {e['bytes'] / 1048576:.1f} MB" + (f"\n{e['excerpt']}" if e.get("excerpt") else ""))
+            if e.get("cover"):
+                key = (e["cover"], e.get("mtime"))
+                icon = self.cover_icons[key] = icons.get(key) or QIcon(e["cover"]) # Loaded when painted
+                item.setIcon(icon)
+            self.proj_list.addItem(item)
+            if name == selected:
+                self.proj_list.setCurrentItem(item)
+
+    def selected_project(self):
+        item = self.proj_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
 
     def load_project(self):
         """Load selected project"""
-        item = self.proj_list.currentItem()
-        if not item: return
+        name = self.selected_project()
+        if not name: return
         
-        project_path = os.path.join(self.get_project_dir(), item.text(), "project.json")
-        if not os.path.exists(project_path):
+        storage = open_project_storage(self.get_project_dir(), name)
+        if not storage.exists():
             QMessageBox.warning(self, "Fehler", "Projekt-Datei nicht gefunden!")
             return
         
         try:
-            with open(project_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            t0 = time.monotonic()
+            data = storage.load()
             
             # Load steps
             self.steps = []
-            img_path = os.path.join(self.get_project_dir(), item.text(), "images")
+            decoded = {} # filename -> image handle, shared (deduplicated) files are decoded once
             for step_data in data.get("steps", []):
-                img_file = os.path.join(img_path, step_data["image"])
-                if os.path.exists(img_file):
-                    img = cv2.imread(img_file)
+                if storage.has_image(step_data["image"]):
+                    img = decoded.get(step_data["image"])
+                    if img is None:
+                        img = decoded[step_data["image"]] = storage.read_image(step_data["image"])
                     step = Step(img, 0, 0, step_data.get("description", ""))
+                    step.meta = step_data.get("meta", {})
+                    if step_data.get("hover_image") and storage.has_image(step_data["hover_image"]):
+                        step.hover_img = storage.read_image(step_data["hover_image"])
                     step.layers = [] # Reset default click
                     for l_data in step_data.get("layers", []):
                         step.layers.append(Layer(l_data['type'], l_data['data'], l_data.get('label', 'Layer')))
@@ -4190,29 +7872,281 @@ class ProRecorder(QMainWindow):
                 self.global_layers.append(Layer(gl_data['type'], gl_data['data'], gl_data.get('label', 'Global Layer'), True))
             
             if self.steps:
-                self.open_editor(project_name=item.text())
+                t_meta = time.monotonic()
+                self.open_editor(project_name=name)
+                # Measured once the editor showing step 1 has been painted
+                QTimer.singleShot(0, lambda: self.record_open_time(name, len(self.steps), t0, t_meta))
             else:
                 QMessageBox.warning(self, "Warnung", "Keine Schritte im Projekt gefunden!")
         except Exception as e:
             QMessageBox.critical(self, "Fehler", f"Projekt konnte nicht geladen werden: {str(e)}")
 
+    def record_open_time(self, name, steps, t0, t_meta):
+        """Time-to-first-step of a project open, appended to reports/project_open.jsonl"""
+        entry = {
+            "date": datetime.now().isoformat(timespec='seconds'),
+            "project": name,
+            "steps": steps,
+            "metadata_ms": round((t_meta - t0) * 1000, 1),
+            "first_step_ms": round((time.monotonic() - t0) * 1000, 1)
+        }
+        print(f"Project open: {entry['first_step_ms']} ms to first step ({steps} steps)")
+        try:
+            path = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "reports", "project_open.jsonl")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"Open report failed: {e}")
+        if getattr(self, 'editor', None):
+            self.editor.statusBar().showMessage(f"Projekt geöffnet in {entry['first_step_ms']:.0f} ms ({steps} Schritte)", 5000)
+
     def delete_project(self):
         """Delete selected project"""
-        item = self.proj_list.currentItem()
-        if not item: return
+        name = self.selected_project()
+        if not name: return
         
         reply = QMessageBox.question(self, 'Löschen', 
-                                    f"Projekt '{item.text()}' wirklich löschen?", 
+                                    f"Projekt '{name}' wirklich löschen?", 
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                shutil.rmtree(os.path.join(self.get_project_dir(), item.text()))
+                open_project_storage(self.get_project_dir(), name).delete()
                 self.update_project_list()
                 QMessageBox.information(self, "Erfolg", "Projekt gelöscht!")
             except Exception as e:
                 QMessageBox.critical(self, "Fehler", f"Löschen fehlgeschlagen: {str(e)}")
 
+# ==================== HEADLESS HARNESS ====================
+
+# Stand-ins for pynput's Button / Key / KeyCode, the pipeline only reads name and char
+ScriptedButton = namedtuple("ScriptedButton", "name")
+ScriptedKey = namedtuple("ScriptedKey", "name char")
+
+class ScriptedSource:
+    """Headless stand-in for the desktop. Replays a script of input events through the
+    pipeline's hook callbacks (so capture rules, queueing and timing work as with
+    pynput) while a SyntheticCaptureBackend serves the screen.
+    Script entries are dicts with 't' (seconds from start) and one of
+      click: [x, y] (+ 'button'), press / release: [x, y], scroll: [x, y, dy],
+      type: "text", key: "enter"
+    plus optionally frame: n to switch the screen to frame n first.
+    lossless waits for the event queue instead of dropping input like the real hook."""
+    def __init__(self, script, frames=None, size=(1920, 1080), speed=1.0, lossless=True):
+        self.script = sorted(script, key=lambda e: e.get('t', 0))
+        self.backend = SyntheticCaptureBackend(frames, size, cycle=False)
+        self.speed = speed
+        self.lossless = lossless
+        self.thread = None
+        self.running = False
+
+    @property
+    def monitors(self):
+        h, w = self.backend.frames[0].shape[:2]
+        return [(0, 0, w, h)]
+
+    def start(self, pipeline):
+        self.running = True
+        self.thread = threading.Thread(target=self.replay, args=(pipeline,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(1.0)
+
+    def replay(self, pipeline):
+        t0 = time.monotonic()
+        for event in self.script:
+            if not self.running: return
+            delay = t0 + event.get('t', 0) / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            while self.lossless and self.running and pipeline.event_queue.qsize() > CapturePipeline.MAX_PENDING_EVENTS - 8:
+                time.sleep(0.001)
+            self.dispatch(pipeline, event)
+        pipeline.event_queue.put(("end",)) # The pipeline stops after the last event
+
+    def dispatch(self, p, e):
+        if 'frame' in e:
+            self.backend.index = e['frame'] % len(self.backend.frames)
+        button = ScriptedButton(e.get('button', 'left'))
+        if 'click' in e:
+            p.on_click(*e['click'], button, True)
+            p.on_click(*e['click'], button, False)
+        if 'press' in e:
+            p.on_click(*e['press'], button, True)
+        if 'release' in e:
+            p.on_click(*e['release'], button, False)
+        if 'scroll' in e and p.settings.capture_scroll:
+            x, y, dy = e['scroll']
+            p.on_scroll(x, y, 0, dy)
+        keys = [ScriptedKey(None, c) for c in e.get('type', "")]
+        if 'key' in e:
+            keys.append(ScriptedKey(e['key'], None))
+        for key in keys:
+            p.on_key_press(key)
+            p.on_key_release(key)
+
+def make_click_script(clicks, rate, size=(1920, 1080), frames=8, seed=0):
+    """Clicks at random spots (far enough apart not to be coalesced), new screen for each"""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    script = []
+    for i in range(clicks):
+        x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+        script.append({'t': i / rate, 'frame': i % frames, 'click': [x, y]})
+    return script
+
+def run_recording_harness(script, frames=None, size=(1920, 1080), speed=1.0, overrides=None):
+    """Record a scripted session headless through RecordingThread and ProRecorder.handle_click.
+    Runs without pynput hooks or global hotkeys; settings, journal and projects folder live in
+    a temporary LOCALAPPDATA, so the user's data is neither read nor written.
+    Returns a summary dict (steps, throughput, latency)."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication(sys.argv)
+    data_dir = tempfile.mkdtemp(prefix="clickstep_harness_")
+    local_appdata = os.environ.get('LOCALAPPDATA')
+    os.environ['LOCALAPPDATA'] = data_dir
+    try:
+        return record_harness_session(app, script, frames, size, speed, overrides)
+    finally:
+        if local_appdata is None:
+            os.environ.pop('LOCALAPPDATA', None)
+        else:
+            os.environ['LOCALAPPDATA'] = local_appdata
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def record_harness_session(app, script, frames, size, speed, overrides):
+    recorder = ProRecorder(offer_recovery=False, hotkeys=False)
+    # Default settings of the temporary data folder, changed for this run only
+    recorder.settings.capture_scope = "desktop"
+    recorder.settings.capture_rules = [] # The offscreen "taskbar" must not swallow clicks
+    recorder.settings.capture_settle_min_ms = 0
+    for key, value in (overrides or {}).items():
+        setattr(recorder.settings, key, value)
+    
+    source = ScriptedSource(script, frames, size, speed)
+    recorder.recording_thread.source = source
+    clicks = sum(1 for e in script if 'click' in e or 'press' in e)
+    
+    start = time.perf_counter()
+    recorder.toggle_recording()
+    while recorder.recording_thread.isRunning():
+        app.processEvents()
+        time.sleep(0.001)
+    app.processEvents() # Steps still queued from the thread
+    elapsed = time.perf_counter() - start
+    
+    recorder.is_recording = False
+    recorder.overlay.hide()
+    if recorder.journal:
+        recorder.journal.discard()
+        recorder.journal = None
+    
+    handled = [s['handled'] for s in recorder.latency.samples if 'handled' in s]
+    summary = {
+        'clicks': clicks,
+        'steps': len(recorder.steps),
+        'seconds': round(elapsed, 3),
+        'clicks_per_s': round(clicks / elapsed, 1) if elapsed else 0,
+        'steps_per_s': round(len(recorder.steps) / elapsed, 1) if elapsed else 0,
+        'latency_p50_ms': round(float(np.percentile(handled, 50)), 1) if handled else None,
+        'latency_p95_ms': round(float(np.percentile(handled, 95)), 1) if handled else None,
+        'max_queue_depth': recorder.latency.max_queue_depth,
+        'mode': recorder.settings.capture_mode,
+        'process': recorder.settings.capture_process
+    }
+    recorder.steps = []
+    recorder.close()
+    return summary
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Capture worker process in the frozen build
+    if "--benchmark-capture" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="ClickStep Guide capture benchmark")
+        parser.add_argument("--benchmark-capture", action="store_true")
+        parser.add_argument("--backends", default=",".join(CAPTURE_BACKENDS), help="Comma separated backend names")
+        parser.add_argument("--seconds", type=float, default=3.0, help="Duration per backend")
+        parser.add_argument("--bbox", default=None, help="left,top,right,bottom (default: full screen)")
+        args = parser.parse_args()
+        bbox = tuple(int(v) for v in args.bbox.split(",")) if args.bbox else None
+        run_capture_benchmark(args.backends.split(","), args.seconds, bbox)
+        sys.exit(0)
+    
+    if "--benchmark-codecs" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="ClickStep Guide image codec benchmark")
+        parser.add_argument("--benchmark-codecs", nargs="?", const=None, metavar="FOLDER",
+                            help="Screenshots or a project folder (default: generated frames)")
+        parser.add_argument("--codecs", default=",".join(IMAGE_CODECS), help="Comma separated codec names")
+        parser.add_argument("--limit", type=int, default=None, help="Use at most this many images")
+        args = parser.parse_args()
+        run_codec_benchmark(args.benchmark_codecs, args.codecs.split(","), args.limit)
+        sys.exit(0)
+    
+    if "--collect-tiles" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="Remove tiles no project references any more")
+        parser.add_argument("--collect-tiles", nargs="?", metavar="ROOT",
+                            const=os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser("~")), "ClickStepGuide", "projects"),
+                            help="Projects root (default: the app's projects folder)")
+        args = parser.parse_args()
+        print(f"{TileStore.for_root(args.collect_tiles).collect_garbage()} tiles removed")
+        sys.exit(0)
+    
+    if "--convert-project" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="Convert between project folders and single-file .csgproj projects")
+        parser.add_argument("--convert-project", nargs=2, metavar=("SOURCE", "TARGET"),
+                            help="Folder -> .csgproj file, or .csgproj file -> folder")
+        args = parser.parse_args()
+        source, target = args.convert_project
+        if os.path.isdir(source):
+            ProjectContainer.import_folder(source, target)
+        else:
+            ProjectContainer(source).export_folder(target)
+        print(f"{source} -> {target}")
+        sys.exit(0)
+    
+    if "--harness" in sys.argv:
+        import argparse
+        parser = argparse.ArgumentParser(description="ClickStep Guide headless recording harness")
+        parser.add_argument("--harness", action="store_true")
+        parser.add_argument("--script", default=None, help="JSON file with a list of input events (see ScriptedSource)")
+        parser.add_argument("--clicks", type=int, default=200, help="Generated script: number of clicks")
+        parser.add_argument("--rate", type=float, default=100.0, help="Generated script: clicks per second")
+        parser.add_argument("--frames", default=None, help="Directory with screen images (default: generated frames)")
+        parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor")
+        parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                            help="Override a capture setting, value as JSON (e.g. capture_mode=\"ring\")")
+        parser.add_argument("--expect-steps", type=int, default=None, help="Exit with 1 if the step count differs")
+        parser.add_argument("--expect-rate", type=float, default=None, metavar="CLICKS_PER_S",
+                            help="Exit with 1 if fewer clicks per second were handled")
+        args = parser.parse_args()
+        
+        overrides = {}
+        for item in args.set:
+            key, value = item.split("=", 1)
+            try:
+                overrides[key] = json.loads(value)
+            except ValueError:
+                overrides[key] = value
+        h, w = SyntheticCaptureBackend(args.frames).frames[0].shape[:2]
+        if args.script:
+            with open(args.script, "r", encoding="utf-8") as f:
+                script = json.load(f)
+        else:
+            script = make_click_script(args.clicks, args.rate, (w, h))
+        summary = run_recording_harness(script, args.frames, (w, h), args.speed, overrides)
+        print(json.dumps(summary, indent=4))
+        failed = args.expect_steps is not None and summary['steps'] != args.expect_steps
+        if args.expect_rate is not None and summary['clicks_per_s'] < args.expect_rate:
+            print(f"Throughput {summary['clicks_per_s']} clicks/s is below the expected {args.expect_rate}")
+            failed = True
+        sys.exit(1 if failed else 0)
+    
     app = QApplication(sys.argv)
     window = ProRecorder()
     window.show()
@@ -0,0 +1,18 @@
+import importlib.util
+import os
+
+import pytest
+
+for module in ("numpy", "cv2", "PIL", "docx", "PyQt6.QtWidgets"):
+    pytest.importorskip(module)
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ClickStep Guide.py")
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The application module, loaded from its file (the name has a space)"""
+    spec = importlib.util.spec_from_file_location("clickstep_guide", APP_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
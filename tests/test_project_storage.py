@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def screenshot(seed, shape=(96, 160, 3)):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def load_steps(app, storage):
+    return [app.Step(storage.read_image(entry["image"]), 0, 0, entry["description"])
+            for entry in storage.load()["steps"]]
+
+
+@pytest.mark.parametrize("project_format", ["folder", "container"])
+def test_deleted_step_survives_save_with_tiles_codec(app, tmp_path, project_format):
+    storage = app.open_project_storage(str(tmp_path), "demo", project_format, "tiles")
+    images = [screenshot(i) for i in range(3)]
+    storage.save([app.Step(img, 10, 10, f"Schritt {i}") for i, img in enumerate(images)], [], None)
+
+    steps = load_steps(app, storage)
+    deleted = steps.pop(1).image_ref # Still referenced by the undo stack
+    storage.save(steps, [], None) # Collects the deleted step's tile map
+
+    assert len(storage.load()["steps"]) == 2
+    assert np.array_equal(deleted.array(), images[1])
+    assert [np.array_equal(s.raw_img, img) for s, img in zip(load_steps(app, storage), (images[0], images[2]))] == [True, True]
+
+
+@pytest.mark.parametrize("project_format", ["folder", "container"])
+def test_webp_falls_back_to_png_beyond_its_size_limit(app, tmp_path, project_format):
+    storage = app.open_project_storage(str(tmp_path), "demo", project_format, "webp")
+    tall = screenshot(1, (16400, 8, 3)) # Stitched scroll capture
+    storage.save([app.Step(screenshot(0), 0, 0, "klein"), app.Step(tall, 0, 0, "lang")], [], None)
+
+    names = [entry["image"] for entry in storage.load()["steps"]]
+    assert [os.path.splitext(n)[1] for n in names] == [".webp", ".png"]
+    if project_format == "container":
+        db = app.sqlite3.connect(storage.path)
+        assert sorted(ext for (ext,) in db.execute("SELECT ext FROM blobs")) == [".png", ".webp"]
+        db.close()
+    assert np.array_equal(load_steps(app, storage)[1].raw_img, tall)
+
+
+def test_container_skips_steps_whose_image_is_missing(app, tmp_path):
+    storage = app.open_project_storage(str(tmp_path), "demo", "container")
+    storage.save([app.Step(screenshot(i), 0, 0, f"Schritt {i}") for i in range(2)], [], None)
+    missing = storage.load()["steps"][0]["image"]
+    db = app.sqlite3.connect(storage.path)
+    with db:
+        db.execute("DELETE FROM blobs WHERE hash = ?", (app.image_name_digest(missing),))
+    db.close()
+
+    storage = app.open_project_storage(str(tmp_path), "demo", "container")
+    assert [storage.has_image(entry["image"]) for entry in storage.load()["steps"]] == [False, True]
+    assert storage.read_image(missing) is None
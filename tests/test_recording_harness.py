@@ -0,0 +1,15 @@
+import os
+
+
+def test_harness_records_without_desktop_or_user_data(app, tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    size = (320, 240) # Smaller than the generated dialogs, frames must still be made
+    script = app.make_click_script(6, rate=50, size=size, frames=3)
+
+    summary = app.run_recording_harness(script, size=size)
+
+    assert summary["steps"] == 6
+    assert summary["clicks_per_s"] > 0 and summary["latency_p50_ms"] is not None
+    assert os.listdir(tmp_path) == [] # Settings, journal and projects went to the harness's own folder
+    assert os.environ["LOCALAPPDATA"] == str(tmp_path)